@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Latency and memory benchmark for the query embedding backends (fp32 PyTorch, ONNX, int8 ONNX).
+Each backend runs in a fresh process so its peak RSS is measured in isolation.
+
+Usage: python benchmarks/bench_embedding_backends.py [--backends torch onnx-int8] [--queries 200]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+QUERIES = [
+    "Italian restaurant for dinner",
+    "Coffee shop with wifi",
+    "Family-friendly breakfast place",
+    "Trendy bar for drinks",
+    "pizza recommend find search",
+    "chinese food restaurant delicious tasty good popular",
+    "cheap affordable budget restaurant lunch",
+    "romantic date couple restaurant quiet peaceful",
+]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def run_backend(backend: str, queries: int, batch_size: int) -> dict:
+    """Load one backend and time single-query and batched encoding."""
+    from book_agent.embedding_model import load_embedding_model
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    model = load_embedding_model(backend=backend)
+    load_s = time.perf_counter() - start
+
+    # Warm up
+    model.encode(QUERIES)
+
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        model.encode([QUERIES[i % len(QUERIES)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    batch = [QUERIES[i % len(QUERIES)] for i in range(batch_size)]
+    start = time.perf_counter()
+    model.encode(batch, batch_size=batch_size)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "mean_ms": statistics.mean(latencies),
+        "batch_qps": batch_size / batch_s,
+        "model_rss_mb": peak_rss_mb() - rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', nargs='+', default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.queries, args.batch_size)))
+        return
+
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'batch q/s':>10} {'peak RSS MB':>12}")
+    for backend in args.backends:
+        result = subprocess.run(
+            [sys.executable, __file__, '--child', backend,
+             '--queries', str(args.queries), '--batch-size', str(args.batch_size)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(f"{backend:<10} failed: {result.stderr.strip().splitlines()[-1:]}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{backend:<10} {stats['load_s']:>7.2f} {stats['p50_ms']:>7.2f} {stats['p95_ms']:>7.2f} "
+              f"{stats['batch_qps']:>10.1f} {stats['peak_rss_mb']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark filtered restaurant search: overfetch-and-filter in Python vs. filters pushed
+down into Qdrant. Reports latency and fill rate (results returned / limit).
+
+By default a synthetic in-memory collection is built. Pass --host to run against
+the real 'restaurants' collection of a Qdrant server instead.
+
+Usage: python benchmarks/bench_filtered_search.py [--host localhost] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from book_agent.restaurant_search import RestaurantSearchService, SearchFilters
+
+COLLECTION = "restaurants"
+
+SCENARIOS = {
+    "unfiltered": None,
+    "category": SearchFilters(categories=["Italian"]),
+    "4 stars": SearchFilters(min_stars=4.0),
+    "kids + 4 stars + city": SearchFilters(location="Goleta", min_stars=4.0, good_for_kids=True),
+    "dogs + category": SearchFilters(dogs_allowed=True, categories=["Mexican"]),
+}
+
+CITIES = ["Santa Barbara"] * 8 + ["Goleta", "Carpinteria", "Montecito", "Isla Vista"]
+CATEGORIES = ["Italian", "Pizza", "Mexican", "Chinese", "Coffee & Tea", "Bars",
+              "Seafood", "Sandwiches", "Breakfast & Brunch", "American (New)"]
+
+def build_synthetic_collection(client: QdrantClient, size: int, dim: int, seed: int = 0):
+    """Create an in-memory collection with random vectors and realistic payloads."""
+    rng = random.Random(seed)
+    vectors = np.random.default_rng(seed).standard_normal((size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    client.create_collection(COLLECTION, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    points = [
+        PointStruct(id=i, vector=vectors[i].tolist(), payload={
+            "restaurant_id": f"rest_{i}",
+            "name": f"Restaurant {i}",
+            "city": rng.choice(CITIES),
+            "stars": rng.choice([2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0]),
+            "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+            "good_for_kids": rng.random() < 0.5,
+            "dogs_allowed": rng.random() < 0.2,
+        })
+        for i in range(size)
+    ]
+    client.upsert(COLLECTION, points)
+
+def overfetch_search(client, vector, filters, limit):
+    """Previous approach: fetch limit * 2 hits and filter in Python."""
+    results = client.search(collection_name=COLLECTION, query_vector=vector, limit=limit * 2)
+    if filters:
+        results = RestaurantSearchService._apply_manual_filters(results, filters)
+    return results[:limit]
+
+def pushdown_search(client, vector, filters, limit):
+    """Filters translated into a native Qdrant filter."""
+    return client.search(collection_name=COLLECTION, query_vector=vector,
+                         query_filter=RestaurantSearchService._build_qdrant_filter(filters),
+                         limit=limit)
+
+def run(search, client, queries, filters, limit):
+    latencies, fill = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        results = search(client, vector, filters, limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+        fill.append(len(results) / limit)
+    latencies.sort()
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "fill_rate": statistics.mean(fill),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', help='Qdrant host; omit to use a synthetic in-memory collection')
+    parser.add_argument('--port', type=int, default=6333)
+    parser.add_argument('--size', type=int, default=759, help='Synthetic collection size')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.host:
+        client = QdrantClient(host=args.host, port=args.port)
+        dim = client.get_collection(COLLECTION).config.params.vectors.size
+    else:
+        client = QdrantClient(":memory:")
+        dim = 384
+        build_synthetic_collection(client, args.size, dim)
+
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((args.queries, dim)).astype(np.float32)
+    queries = [(q / np.linalg.norm(q)).tolist() for q in queries]
+
+    print(f"{'scenario':<24} {'mode':<10} {'mean ms':>8} {'p95 ms':>8} {'fill':>6}")
+    for name, filters in SCENARIOS.items():
+        for mode, search in (("overfetch", overfetch_search), ("pushdown", pushdown_search)):
+            stats = run(search, client, queries, filters, args.limit)
+            print(f"{name:<24} {mode:<10} {stats['mean_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['fill_rate']:>6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the compiled intent router.
+Shows per-message routing cost as the keyword table grows, next to the previous
+one-any()-scan-per-keyword-list approach.
+
+Usage: python benchmarks/bench_intent_router.py [--iterations N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from book_agent.intent_router import INTENT_KEYWORDS
+from book_agent.keyword_matcher import KeywordMatcher
+
+MESSAGES = [
+    "안녕하세요",
+    "피자 추천해줘",
+    "이탈리아 음식 맛집 알려줘",
+    "홍콩반점 내일 저녁 7시 4명 예약해줘",
+    "Italian restaurant for dinner",
+    "조용한 카페 찾아줘",
+]
+
+def grow_table(extra_per_label: int) -> dict:
+    """Pad every label with synthetic keywords that never match the messages."""
+    rng = random.Random(0)
+    syllables = "갸냐댜랴먀뱌샤야쟈챠캬탸퍄햐"
+    table = {}
+    for label, keywords in INTENT_KEYWORDS.items():
+        padding = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5)))
+                   for _ in range(extra_per_label)]
+        table[label] = list(keywords) + padding
+    return table
+
+def linear_scan(table: dict, message: str) -> dict:
+    """Previous approach: one any() substring scan per keyword list."""
+    user_lower = message.lower()
+    return {label: True for label, keywords in table.items()
+            if any(keyword in user_lower for keyword in keywords)}
+
+def per_message_us(func, iterations: int) -> float:
+    def run():
+        for message in MESSAGES:
+            func(message)
+    seconds = min(timeit.repeat(run, number=iterations, repeat=3))
+    return seconds / (iterations * len(MESSAGES)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'keywords':>9} {'linear us':>10} {'compiled us':>12}")
+    for extra in (0, 50, 200, 1000):
+        table = grow_table(extra)
+        matcher = KeywordMatcher(table)
+
+        # Both approaches must agree on the matched labels
+        for message in MESSAGES:
+            assert set(matcher.match(message)) == set(linear_scan(table, message)), message
+
+        total = sum(len(keywords) for keywords in table.values())
+        linear = per_message_us(lambda message: linear_scan(table, message), args.iterations)
+        compiled = per_message_us(matcher.match, args.iterations)
+        print(f"{total:>9} {linear:>10.2f} {compiled:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare the two embedding modes on Korean queries:
+translate + all-MiniLM-L6-v2 against the multilingual model with no translation.
+Reports end-to-end search latency and top-k agreement, between the modes and with
+the English reference query embedded by all-MiniLM-L6-v2.
+
+Both modes are indexed into temporary NumPy indexes from the restaurants file, so no
+Qdrant server is needed. The search and translation caches are disabled.
+
+Usage: python benchmarks/bench_multilingual_search.py [--restaurants-file yelp/restaurants_smart_enhanced.json] [--k 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Every translation must hit the model
+os.environ["TRANSLATION_CACHE_PATH"] = ""
+os.environ["TRANSLATION_CACHE_SIZE"] = "0"
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from book_agent.embedding_model import load_embedding_model, EMBEDDING_MODELS
+from book_agent.restaurant_search import RestaurantSearchService
+from book_agent.translation_service import get_translation_service
+from book_agent.vector_backend import save_numpy_index
+from setup_qdrant import build_embedding_text, build_payload
+
+# Korean query -> English reference query
+QUERIES = {
+    "중식집 추천해줘": "recommend a chinese restaurant",
+    "피자 추천해줘": "recommend a pizza place",
+    "이탈리아 음식": "italian food",
+    "일식집 알려줘": "japanese restaurant",
+    "태국 음식점": "thai restaurant",
+    "스테이크 맛집": "good steak restaurant",
+    "카페 찾아줘": "find a cafe",
+    "브런치 카페": "brunch cafe",
+    "아이와 가기 좋은 가족 식당": "family friendly restaurant for kids",
+    "분위기 좋은 데이트 레스토랑": "romantic date night restaurant",
+    "저렴한 멕시코 음식": "cheap mexican food",
+    "해산물 저녁": "seafood dinner",
+}
+
+def build_index(mode: str, restaurants: list, index_dir: str) -> float:
+    """Embed the restaurants with the model of one mode into a NumPy index. Returns seconds taken."""
+    start = time.perf_counter()
+    model = load_embedding_model(EMBEDDING_MODELS[mode])
+    texts = [build_embedding_text(restaurant) for restaurant in restaurants]
+    embeddings = model.encode(texts, batch_size=64, convert_to_numpy=True)
+    save_numpy_index(index_dir, embeddings,
+                     [build_payload(restaurant) for restaurant in restaurants])
+    return time.perf_counter() - start
+
+def top_ids(service: RestaurantSearchService, query: str, k: int) -> list:
+    return [result['restaurant_id'] for result in service.search_restaurants(query, limit=k)]
+
+def overlap(a: list, b: list, k: int) -> float:
+    return len(set(a) & set(b)) / k
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--restaurants-file', default="yelp/restaurants_smart_enhanced.json")
+    parser.add_argument('--max-docs', type=int, default=0, help="Index only the first N restaurants (0 = all)")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.restaurants_file, 'r', encoding='utf-8') as f:
+        restaurants = json.load(f)
+    if args.max_docs:
+        restaurants = restaurants[:args.max_docs]
+
+    services = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in EMBEDDING_MODELS:
+            index_dir = os.path.join(tmp, mode)
+            print(f"Indexing {len(restaurants)} restaurants for {mode} mode "
+                  f"({EMBEDDING_MODELS[mode]}): {build_index(mode, restaurants, index_dir):.1f}s")
+            services[mode] = RestaurantSearchService(vector_backend="numpy", numpy_index_dir=index_dir,
+                                                     embedding_mode=mode, cache_size=0,
+                                                     embedding_batch_size=1)
+
+        # Load the translation model before timing
+        if get_translation_service().translator is None:
+            print("Warning: translation model unavailable, translate mode uses the pattern fallback")
+
+        print(f"\n{'mode':<13} {'p50 ms':>7} {'p95 ms':>7} {'mean ms':>8}")
+        for mode, service in services.items():
+            service.search_restaurants(next(iter(QUERIES)), limit=args.k)
+            latencies = []
+            for _ in range(args.rounds):
+                for query in QUERIES:
+                    start = time.perf_counter()
+                    service.search_restaurants(query, limit=args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            print(f"{mode:<13} {latencies[len(latencies) // 2]:>7.2f} "
+                  f"{latencies[int(len(latencies) * 0.95) - 1]:>7.2f} {statistics.mean(latencies):>8.2f}")
+
+        # English reference: the hand-written English query on the translate-mode index
+        agreement = {"translate vs multilingual": [], "translate vs reference": [], "multilingual vs reference": []}
+        for query, reference in QUERIES.items():
+            translated = top_ids(services["translate"], query, args.k)
+            multilingual = top_ids(services["multilingual"], query, args.k)
+            expected = top_ids(services["translate"], reference, args.k)
+            agreement["translate vs multilingual"].append(overlap(translated, multilingual, args.k))
+            agreement["translate vs reference"].append(overlap(translated, expected, args.k))
+            agreement["multilingual vs reference"].append(overlap(multilingual, expected, args.k))
+
+        print(f"\nTop-{args.k} agreement (mean overlap over {len(QUERIES)} queries)")
+        for name, values in agreement.items():
+            print(f"  {name:<27} {statistics.mean(values):.2f}")
+
+if __name__ == "__main__":
+    main()
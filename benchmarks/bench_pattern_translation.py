@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the pattern-based Korean translation fallback.
+Compares the previous per-pattern regex loop with the compiled single-pass matcher.
+
+Usage: python benchmarks/bench_pattern_translation.py [--iterations N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from book_agent.translation_service import KOREAN_FOOD_PATTERNS, KOREAN_FOOD_MATCHER, KOREAN_PATTERN
+
+QUERIES = [
+    "중식집 추천해줘",
+    "피자 추천해줘",
+    "이탈리아 음식",
+    "일식집 알려줘",
+    "태국 음식점",
+    "스테이크 맛집",
+    "카페 찾아줘",
+    "브런치 카페",
+    "아이랑 가기 좋은 조용한 바베큐 맛집 추천해줘",
+    "저렴한 점심 먹고싶어",
+]
+
+def legacy_match(text: str) -> list:
+    """Previous implementation: one re.search plus one re.sub per pattern on every call."""
+    translated_parts = []
+    remaining_text = text
+    for korean_pattern, english_translation in KOREAN_FOOD_PATTERNS.items():
+        if re.search(korean_pattern, text, re.IGNORECASE):
+            translated_parts.append(english_translation)
+            remaining_text = re.sub(korean_pattern, '', remaining_text, flags=re.IGNORECASE)
+    return translated_parts
+
+def legacy_is_korean(text: str) -> bool:
+    korean_pattern = re.compile(r'[가-힣]+')
+    return bool(korean_pattern.search(text))
+
+def compiled_is_korean(text: str) -> bool:
+    return bool(KOREAN_PATTERN.search(text))
+
+def per_call_us(func, iterations: int) -> float:
+    """Mean microseconds per call over the query set."""
+    def run():
+        for query in QUERIES:
+            func(query)
+    seconds = min(timeit.repeat(run, number=iterations, repeat=3))
+    return seconds / (iterations * len(QUERIES)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Both implementations must find the same concepts
+    for query in QUERIES:
+        before = legacy_match(query)
+        after = KOREAN_FOOD_MATCHER.match(query)
+        assert before == after, f"Mismatch for '{query}': {before} != {after}"
+
+    rows = [
+        ("pattern match (before)", per_call_us(legacy_match, args.iterations)),
+        ("pattern match (after)", per_call_us(KOREAN_FOOD_MATCHER.match, args.iterations)),
+        ("is_korean_text (before)", per_call_us(legacy_is_korean, args.iterations)),
+        ("is_korean_text (after)", per_call_us(compiled_is_korean, args.iterations)),
+    ]
+
+    print(f"{len(QUERIES)} queries x {args.iterations} iterations")
+    for name, us in rows:
+        print(f"  {name:<26} {us:8.2f} us/call")
+    print(f"  pattern match speedup: {rows[0][1] / rows[1][1]:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Time each stage of the search and translation hot path on a fixed Korean/English query set:
+translation, query encoding, vector search, manual filtering, response formatting and the
+full agent turn (_handle_user_message). Reports mean and p50/p95/p99 latency per stage,
+plus peak RSS after each stage, to show which stage a slow turn spends its time in.
+
+The collection is built in memory from the first --max-docs restaurants of the
+restaurants file: a NumPy index (--backend numpy) or a Qdrant local-mode collection
+(--backend qdrant-local), so no Qdrant server is needed. --backend qdrant uses the
+existing collection of the server at --host instead. Search and translation caches
+are disabled so every call does the work.
+
+Stages run one after another, so the growth of peak RSS is attributable to each stage.
+
+Usage: python benchmarks/bench_search_stages.py [--backend numpy] [--restaurants-file yelp/restaurants.json] [--output stages.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+# Every translation must hit the model, every search the index
+os.environ["TRANSLATION_CACHE_PATH"] = ""
+os.environ["TRANSLATION_CACHE_SIZE"] = "0"
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from book_agent import restaurant_search
+from book_agent.embedding_model import load_embedding_model, EMBEDDING_MODELS, EMBEDDING_MODE
+from book_agent.restaurant_search import RestaurantSearchService, format_restaurant_response
+from book_agent.translation_service import get_translation_service, translate_korean_query
+from book_agent.vector_backend import QdrantBackend, save_numpy_index
+from setup_qdrant import build_embedding_text, build_payload
+
+QUERIES = [
+    "피자 추천해줘",
+    "중식집 추천해줘",
+    "이탈리아 음식",
+    "아이와 가기 좋은 가족 식당",
+    "분위기 좋은 데이트 레스토랑",
+    "강아지 데려갈 수 있는 카페",
+    "recommend a pizza place",
+    "family friendly mexican restaurant for kids",
+    "seafood dinner",
+    "coffee shop with 4 star rating",
+]
+
+LIMIT = 3
+# Candidates fetched unfiltered before _apply_manual_filters, as the pre-pushdown search did
+OVERFETCH = 10
+COLLECTION = "restaurants"
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(1, math.ceil(q / 100 * len(sorted_values))) - 1]
+
+def load_fixture(path: str, max_docs: int) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        restaurants = json.load(f)
+    return restaurants[:max_docs] if max_docs else restaurants
+
+def build_service(args, tmp: str) -> RestaurantSearchService:
+    """Create an uncached search service on the chosen backend."""
+    if args.backend == "qdrant":
+        return RestaurantSearchService(qdrant_host=args.host, vector_backend="qdrant",
+                                       cache_size=0, embedding_batch_size=1)
+
+    restaurants = load_fixture(args.restaurants_file, args.max_docs)
+    model = load_embedding_model(EMBEDDING_MODELS[EMBEDDING_MODE])
+    embeddings = model.encode([build_embedding_text(r) for r in restaurants],
+                              batch_size=64, convert_to_numpy=True)
+    payloads = [build_payload(restaurant) for restaurant in restaurants]
+    save_numpy_index(tmp, embeddings, payloads)
+    # The NumPy index is also the service's starting backend for qdrant-local
+    service = RestaurantSearchService(vector_backend="numpy", numpy_index_dir=tmp,
+                                      cache_size=0, embedding_batch_size=1)
+
+    if args.backend == "qdrant-local":
+        from qdrant_client import QdrantClient
+        from qdrant_client.models import Distance, PointStruct, VectorParams
+        client = QdrantClient(":memory:")
+        client.create_collection(COLLECTION, vectors_config=VectorParams(size=embeddings.shape[1],
+                                                                          distance=Distance.COSINE))
+        client.upsert(COLLECTION, points=[PointStruct(id=i, vector=vector.tolist(), payload=payload)
+                                          for i, (vector, payload) in enumerate(zip(embeddings, payloads))])
+        service.client = client
+        service.backend = QdrantBackend(client, COLLECTION)
+    print(f"Indexed {len(restaurants)} restaurants into the {service.backend.name} backend")
+    return service
+
+def time_stage(func, inputs: list, rounds: int) -> dict:
+    """Call func on every input for a number of rounds, after one untimed warm-up pass."""
+    for value in inputs:
+        func(value)
+    latencies = []
+    for _ in range(rounds):
+        for value in inputs:
+            start = time.perf_counter()
+            func(value)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency of the search and translation hot path")
+    parser.add_argument('--backend', choices=["numpy", "qdrant-local", "qdrant"], default="numpy")
+    parser.add_argument('--host', default="localhost", help="Qdrant server for --backend qdrant")
+    parser.add_argument('--restaurants-file', default="yelp/restaurants.json")
+    parser.add_argument('--max-docs', type=int, default=200, help="Fixture size (0 = all restaurants)")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', help="Write the results as JSON here")
+    args = parser.parse_args()
+
+    rss_start = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = build_service(args, tmp)
+        # The agent's recommendation flow goes through the global service
+        restaurant_search._search_service = service
+        from book_agent.agent import _handle_user_message
+
+        if get_translation_service().translator is None:
+            print("Warning: translation model unavailable, translation uses the pattern fallback")
+        rss_setup = peak_rss_mb()
+
+        # Inputs of each stage are the outputs of the previous one, prepared untimed
+        translated = [translate_korean_query(query) for query in QUERIES]
+        vectors = [service.model.encode([text], convert_to_numpy=True)[0] for text in translated]
+        filters = [service._parse_preferences(text, "") for text in translated]
+        candidates = [service.backend.search(vector, None, LIMIT * OVERFETCH) for vector in vectors]
+        restaurants = [service.search_restaurants(text, limit=LIMIT) for text in translated]
+
+        stages = {
+            "translate_korean_query": (translate_korean_query, QUERIES),
+            "encode": (lambda text: service.model.encode([text], convert_to_numpy=True), translated),
+            "vector_search": (lambda vector: service.backend.search(vector, None, LIMIT), vectors),
+            "vector_search_filtered": (lambda pair: service.backend.search(pair[0], pair[1], LIMIT),
+                                       list(zip(vectors, filters))),
+            "_apply_manual_filters": (lambda pair: RestaurantSearchService._apply_manual_filters(*pair),
+                                      list(zip(candidates, filters))),
+            "format_restaurant_response": (format_restaurant_response, restaurants),
+            "_handle_user_message": (_handle_user_message, QUERIES),
+        }
+        results = {name: time_stage(func, inputs, args.rounds) for name, (func, inputs) in stages.items()}
+
+    print(f"\nBackend: {args.backend}, {len(QUERIES)} queries x {args.rounds} rounds")
+    print(f"Peak RSS: {rss_start:.1f} MB at start, {rss_setup:.1f} MB after loading models and index")
+    print(f"\n{'stage':<27} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak RSS MB':>12}")
+    for name, stats in results.items():
+        print(f"{name:<27} {stats['mean_ms']:>8.2f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+              f"{stats['p99_ms']:>8.2f} {stats['peak_rss_mb']:>12.1f}")
+
+    if args.output:
+        report = {
+            "backend": args.backend,
+            "queries": QUERIES,
+            "rounds": args.rounds,
+            "peak_rss_mb": {"start": rss_start, "after_setup": rss_setup},
+            "stages": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
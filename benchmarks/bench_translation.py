@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Latency and CPU benchmark for the Korean to English translation model (fp32 vs int8).
+Compares one-query-at-a-time calls, translate_batch and concurrent micro-batched calls.
+Each load mode runs in a fresh process and the translation cache is disabled.
+
+Usage: python benchmarks/bench_translation.py [--modes fp32 int8] [--rounds 5] [--concurrency 8]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+# Korean queries from test_translation_direct.py
+QUERIES = [
+    "중식집 추천해줘",
+    "피자 추천해줘",
+    "이탈리아 음식",
+    "일식집 알려줘",
+    "태국 음식점",
+    "스테이크 맛집",
+    "카페 찾아줘",
+    "브런치 카페",
+]
+
+def measure(fn, queries: int) -> dict:
+    """Run fn once and return wall and CPU time per query."""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    fn()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    return {"ms_per_query": wall * 1000 / queries, "cpu_s_per_query": cpu / queries}
+
+def run_mode(mode: str, rounds: int, concurrency: int) -> dict:
+    """Load the model in one mode and time sequential, batched and concurrent translation."""
+    from book_agent.translation_service import TranslationService
+
+    start = time.perf_counter()
+    service = TranslationService(cache_path="", cache_size=0, load_mode=mode,
+                                 max_batch_size=concurrency)
+    load_s = time.perf_counter() - start
+    if not service.translator:
+        raise RuntimeError("translation model could not be loaded")
+
+    # Warm up
+    service.translate_batch(QUERIES)
+
+    latencies = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            service.translate_korean_to_english(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    total = rounds * len(QUERIES)
+    sequential = measure(lambda: [service.translate_korean_to_english(q) for _ in range(rounds) for q in QUERIES], total)
+    batched = measure(lambda: [service.translate_batch(QUERIES) for _ in range(rounds)], total)
+    with ThreadPoolExecutor(concurrency) as executor:
+        concurrent = measure(lambda: list(executor.map(service.translate_korean_to_english, QUERIES * rounds)), total)
+
+    return {
+        "mode": mode,
+        "load_s": load_s,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "mean_ms": statistics.mean(latencies),
+        "sequential": sequential,
+        "batched": batched,
+        "concurrent": concurrent,
+        "avg_batch_size": service.batcher.stats()["avg_batch_size"],
+        "sample": service.translate_korean_to_english(QUERIES[0]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=["fp32", "int8"])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.rounds, args.concurrency)))
+        return
+
+    print(f"{'mode':<6} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'seq ms/q':>9} {'seq cpu/q':>10} {'batch ms/q':>11} {'batch cpu/q':>12} "
+          f"{'conc ms/q':>10} {'conc cpu/q':>11}  sample")
+    for mode in args.modes:
+        result = subprocess.run(
+            [sys.executable, __file__, '--child', mode,
+             '--rounds', str(args.rounds), '--concurrency', str(args.concurrency)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(f"{mode:<6} failed: {result.stderr.strip().splitlines()[-1:]}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{mode:<6} {stats['load_s']:>7.2f} {stats['p50_ms']:>7.2f} {stats['p95_ms']:>7.2f} "
+              f"{stats['sequential']['ms_per_query']:>9.2f} {stats['sequential']['cpu_s_per_query']:>10.4f} "
+              f"{stats['batched']['ms_per_query']:>11.2f} {stats['batched']['cpu_s_per_query']:>12.4f} "
+              f"{stats['concurrent']['ms_per_query']:>10.2f} {stats['concurrent']['cpu_s_per_query']:>11.4f}  "
+              f"{stats['sample']}")
+
+if __name__ == "__main__":
+    main()
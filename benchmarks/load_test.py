@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Load test for server.py: drives /session, /greetings and /chat at a target rate
+from a replayable query corpus and writes a JSON report with throughput,
+p50/p95/p99 latency and error rate per endpoint.
+
+A pool of sessions is opened first (/session then /greetings for each). Chat requests
+are then sent open-loop: request i is scheduled at i / rps seconds whether or not
+earlier ones have finished, so a slow server shows up as latency instead of a lower
+request rate. Queries are replayed from the corpus in a seeded order.
+
+With --spawn the mock ADK server (benchmarks/mock_adk_server.py) and server.py in
+proxy mode are started on local ports, so no models or agent are needed. Without it,
+the server at --url is tested as it is.
+
+Pass --baseline with an earlier report to print the change of each metric.
+
+Usage: python benchmarks/load_test.py --spawn [--rps 20] [--duration 30] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.join(BENCH_DIR, '..', 'server')
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, 'load_corpus.txt')
+
+ENDPOINTS = ("/session", "/greetings", "/chat")
+
+def read_corpus(path: str) -> List[str]:
+    """Read queries from plain text (one per line) or JSONL with a "query" or "text" field."""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                record = json.loads(line)
+                line = record.get('query') or record.get('text') or ''
+            if line:
+                queries.append(line)
+    if not queries:
+        raise ValueError(f"No queries in corpus {path}")
+    return queries
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class Recorder:
+    """Collect latency and outcome of every request, per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors: Dict[str, Counter] = {endpoint: Counter() for endpoint in ENDPOINTS}
+        self.windows: Dict[str, List[float]] = {}
+
+    async def post(self, client: httpx.AsyncClient, endpoint: str, payload: Optional[dict] = None) -> Optional[dict]:
+        """POST to an endpoint and record the outcome. Returns the JSON body, or None on failure."""
+        start = time.perf_counter()
+        try:
+            response = await client.post(endpoint, json=payload)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                self.errors[endpoint][f"HTTP {response.status_code}"] += 1
+                return None
+            self.latencies[endpoint].append(elapsed * 1000)
+            return response.json()
+        except httpx.HTTPError as e:
+            self.errors[endpoint][type(e).__name__] += 1
+            return None
+        finally:
+            window = self.windows.setdefault(endpoint, [start, start])
+            window[1] = max(window[1], time.perf_counter())
+
+    def summary(self, endpoint: str) -> dict:
+        latencies = sorted(self.latencies[endpoint])
+        errors = sum(self.errors[endpoint].values())
+        requests = len(latencies) + errors
+        start, end = self.windows.get(endpoint, (0.0, 0.0))
+        elapsed = end - start
+        return {
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "error_kinds": dict(self.errors[endpoint]),
+            "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "max": latencies[-1] if latencies else 0.0,
+            },
+        }
+
+async def open_sessions(client: httpx.AsyncClient, recorder: Recorder, count: int, concurrency: int) -> List[str]:
+    """Open sessions and fetch their greetings. Returns the ids of sessions that succeeded."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def open_one() -> Optional[str]:
+        async with semaphore:
+            body = await recorder.post(client, "/session")
+            if body is None:
+                return None
+            session_id = body["session_id"]
+            if await recorder.post(client, "/greetings", {"session_id": session_id}) is None:
+                return None
+            return session_id
+
+    results = await asyncio.gather(*(open_one() for _ in range(count)))
+    return [session_id for session_id in results if session_id]
+
+async def run_chat_load(client: httpx.AsyncClient, recorder: Recorder, session_ids: List[str],
+                        queries: List[str], rps: float, duration: float, poisson: bool,
+                        seed: int) -> float:
+    """Send chat requests open-loop at the target rate. Returns the worst scheduling lag in ms."""
+    rng = random.Random(seed)
+    order = list(queries)
+    rng.shuffle(order)
+    total = int(rps * duration)
+
+    tasks = []
+    max_lag = 0.0
+    start = time.perf_counter()
+    scheduled = 0.0
+    for i in range(total):
+        # Arrival times are fixed up front by the seed, not by how fast replies come back
+        scheduled += rng.expovariate(rps) if poisson else (1 / rps if i else 0.0)
+        delay = start + scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay * 1000)
+        payload = {"session_id": session_ids[i % len(session_ids)], "text": order[i % len(order)]}
+        tasks.append(asyncio.create_task(recorder.post(client, "/chat", payload)))
+    await asyncio.gather(*tasks)
+    return max_lag
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def spawn_servers(args) -> List[subprocess.Popen]:
+    """Start the mock ADK server and server.py in proxy mode against it."""
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, 'mock_adk_server.py'), '--port', str(args.adk_port),
+         '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+         '--error-rate', str(args.error_rate), '--seed', str(args.seed)],
+    )
+    env = dict(os.environ, AGENT_MODE="proxy", ADK_BASE_URL=f"http://127.0.0.1:{args.adk_port}")
+    # Keep per-request access logs out of the terminal so they do not skew timings
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'server:app', '--host', '127.0.0.1',
+         '--port', str(args.port), '--log-level', 'warning'],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    return [mock, server]
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float):
+    """Poll /readyz until the server has warmed up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/readyz")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server not ready after {timeout}s")
+        await asyncio.sleep(0.2)
+
+async def run(args) -> dict:
+    queries = read_corpus(args.corpus)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        await wait_ready(client, args.ready_timeout)
+        session_ids = await open_sessions(client, recorder, args.sessions, args.max_connections)
+        if not session_ids:
+            raise RuntimeError("Could not open any session")
+        print(f"Opened {len(session_ids)}/{args.sessions} sessions; "
+              f"sending {int(args.rps * args.duration)} chats at {args.rps} rps")
+        max_lag = await run_chat_load(client, recorder, session_ids, queries, args.rps,
+                                      args.duration, args.poisson, args.seed)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "url": args.url,
+            "spawn": args.spawn,
+            "rps": args.rps,
+            "duration_s": args.duration,
+            "sessions": args.sessions,
+            "poisson": args.poisson,
+            "seed": args.seed,
+            "corpus": os.path.basename(args.corpus),
+            "corpus_size": len(queries),
+            "mock_latency_ms": args.latency_ms if args.spawn else None,
+            "mock_jitter_ms": args.jitter_ms if args.spawn else None,
+            "mock_error_rate": args.error_rate if args.spawn else None,
+        },
+        # A large lag means the load generator itself could not keep up with --rps
+        "max_schedule_lag_ms": max_lag,
+        "endpoints": {endpoint: recorder.summary(endpoint) for endpoint in ENDPOINTS},
+    }
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    print(f"\n{'endpoint':<11} {'reqs':>6} {'err %':>6} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, summary in report["endpoints"].items():
+        latency = summary["latency_ms"]
+        print(f"{endpoint:<11} {summary['requests']:>6} {summary['error_rate'] * 100:>6.1f} "
+              f"{summary['throughput_rps']:>7.1f} {latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}")
+    print(f"Max schedule lag: {report['max_schedule_lag_ms']:.1f} ms")
+
+    if baseline:
+        print(f"\nChange against baseline {baseline.get('commit')} ({baseline.get('timestamp')})")
+        for endpoint, summary in report["endpoints"].items():
+            before = baseline.get("endpoints", {}).get(endpoint)
+            if not before:
+                continue
+            changes = []
+            for name in ("p50", "p95", "p99"):
+                old, new = before["latency_ms"][name], summary["latency_ms"][name]
+                changes.append(f"{name} {(new - old) / old * 100:+.1f}%" if old else f"{name} n/a")
+            changes.append(f"error rate {before['error_rate'] * 100:.1f}% -> {summary['error_rate'] * 100:.1f}%")
+            print(f"  {endpoint:<11} " + ", ".join(changes))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py and report throughput and tail latency")
+    parser.add_argument('--url', default=None, help="Server to test (default http://127.0.0.1:<port>)")
+    parser.add_argument('--spawn', action='store_true', help="Start the mock ADK server and server.py locally")
+    parser.add_argument('--port', type=int, default=5055, help="server.py port with --spawn")
+    parser.add_argument('--adk-port', type=int, default=8100, help="Mock ADK port with --spawn")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Mock agent latency with --spawn")
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help="Mock agent latency deviation with --spawn")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Mock agent error rate with --spawn")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--rps', type=float, default=20.0, help="Target chat requests per second")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of chat load")
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--poisson', action='store_true', help="Poisson arrivals instead of a fixed interval")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-connections', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--ready-timeout', type=float, default=120.0)
+    parser.add_argument('--output', help="Write the JSON report here")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+    args.url = args.url or f"http://127.0.0.1:{args.port}"
+
+    processes = spawn_servers(args) if args.spawn else []
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
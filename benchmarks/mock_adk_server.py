@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the ADK api_server, for load-testing server.py without models.
+Serves the session, /run and /run_sse endpoints that server.py calls in proxy mode,
+and answers every turn with a canned reply after a configurable latency.
+
+Latency is drawn from a seeded generator, so a run is repeatable:
+    MOCK_ADK_LATENCY_MS  mean agent latency per turn (default 50)
+    MOCK_ADK_JITTER_MS   standard deviation of the latency (default 0)
+    MOCK_ADK_ERROR_RATE  fraction of turns answered with HTTP 500 (default 0)
+    MOCK_ADK_SEED        seed of the latency and error draws (default 0)
+
+Usage: python benchmarks/mock_adk_server.py [--port 8100] [--latency-ms 50] [--jitter-ms 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY_MS = float(os.getenv("MOCK_ADK_LATENCY_MS", "50"))
+JITTER_MS = float(os.getenv("MOCK_ADK_JITTER_MS", "0"))
+ERROR_RATE = float(os.getenv("MOCK_ADK_ERROR_RATE", "0"))
+SEED = int(os.getenv("MOCK_ADK_SEED", "0"))
+
+GREETING = [{"type": "Message", "text": "안녕하세요! 레스토랑 추천이나 예약을 도와드릴 수 있습니다. 무엇을 도와드릴까요?"}]
+RECOMMENDATION = [{"type": "Message", "text": "추천 레스토랑 3곳을 찾았습니다:"}] + [
+    {
+        "type": "Restaurant Option",
+        "title": f"Mock Restaurant {i}",
+        "id": f"mock-{i}",
+        "description": "Pizza, Italian · ⭐4.5 (120개 리뷰) · 123 State St, Santa Barbara",
+    }
+    for i in range(1, 4)
+]
+
+app = FastAPI()
+sessions = set()
+rng = random.Random(SEED)
+stats = {"turns": 0, "errors": 0}
+
+def reply_event(session_id: str, user_message: str, partial: bool = False) -> dict:
+    """Build an ADK event carrying the reply to one user message."""
+    items = RECOMMENDATION if user_message else GREETING
+    event = {
+        "author": "book_agent",
+        "invocationId": f"e-{session_id}",
+        "content": {"role": "model", "parts": [{"text": json.dumps(items, ensure_ascii=False)}]},
+    }
+    if partial:
+        event["partial"] = True
+    return event
+
+async def simulate_turn(data: dict) -> str:
+    """Validate the turn, wait for the simulated agent latency and return the user message."""
+    session_id = data.get("session_id")
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Draw in arrival order so a run with the same seed sees the same latencies
+    delay_ms = max(0.0, rng.gauss(LATENCY_MS, JITTER_MS)) if JITTER_MS else LATENCY_MS
+    fail = ERROR_RATE > 0 and rng.random() < ERROR_RATE
+    stats["turns"] += 1
+    await asyncio.sleep(delay_ms / 1000)
+    if fail:
+        stats["errors"] += 1
+        raise HTTPException(status_code=500, detail="Simulated agent error")
+
+    parts = (data.get("new_message") or {}).get("parts") or [{}]
+    return parts[0].get("text", "")
+
+@app.post("/apps/{app_name}/users/{user_id}/sessions/{session_id}")
+async def create_session(app_name: str, user_id: str, session_id: str):
+    sessions.add(session_id)
+    return {"id": session_id, "appName": app_name, "userId": user_id, "state": {}, "events": []}
+
+@app.post("/run")
+async def run(request: Request):
+    data = await request.json()
+    user_message = await simulate_turn(data)
+    return [reply_event(data["session_id"], user_message)]
+
+@app.post("/run_sse")
+async def run_sse(request: Request):
+    data = await request.json()
+    user_message = await simulate_turn(data)
+
+    async def events():
+        yield f"data: {json.dumps(reply_event(data['session_id'], user_message), ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/stats")
+async def get_stats():
+    return {"sessions": len(sessions), **stats}
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock ADK api_server with configurable latency")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency-ms', type=float, default=None)
+    parser.add_argument('--jitter-ms', type=float, default=None)
+    parser.add_argument('--error-rate', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    global LATENCY_MS, JITTER_MS, ERROR_RATE, rng
+    if args.latency_ms is not None:
+        LATENCY_MS = args.latency_ms
+    if args.jitter_ms is not None:
+        JITTER_MS = args.jitter_ms
+    if args.error_rate is not None:
+        ERROR_RATE = args.error_rate
+    if args.seed is not None:
+        rng = random.Random(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,28 @@
 """
 Enhanced restaurant description generator with smart review filtering.
 Focuses on quality over quantity for better vector search results.
+Streams JSONL input through a process pool when the input or output path ends in .jsonl.
 """
 
-import json
-import re
+import argparse
 from typing import Dict, List, Any
 from collections import Counter
 
+from record_stream import process_records
+
+# Keyword tables, built once at import (so once per worker process).
+# Substring checks against these short tuples run in C and measured faster than a
+# combined regex, so matching stays a plain scan of the lowercased text
+SPAM_KEYWORDS = ('great place', 'highly recommend', 'will be back', 'love this place')
+FEATURE_KEYWORDS = (
+    'pizza', 'pasta', 'sauce', 'taste', 'flavor', 'fresh', 'spicy', 'sweet',
+    'atmosphere', 'service', 'staff', 'ambiance', 'quiet', 'romantic',
+    'family', 'kids', 'parking', 'location', 'price', 'value'
+)
+FOOD_KEYWORDS = ('pizza', 'coffee', 'burger', 'salad', 'soup', 'dessert', 'drink')
+POSITIVE_KEYWORDS = ('delicious', 'amazing', 'excellent', 'perfect', 'fresh', 'tasty', 'flavorful', 'crispy')
+NEGATIVE_KEYWORDS = ('terrible', 'awful', 'bland', 'overpriced', 'slow', 'rude', 'cold', 'dry')
+
 def filter_high_quality_reviews(reviews: List[Dict], limit: int = 3) -> List[str]:
     """Filter and select high-quality reviews for embedding."""
 
@@ -26,27 +41,15 @@ def filter_high_quality_reviews(reviews: List[Dict], limit: int = 3) -> List[str
         if 10 <= word_count <= 50:  # Sweet spot for meaningful content
             meaningful_reviews.append(review)
 
-    # 3. Filter out generic/spam reviews
-    quality_reviews = []
-    spam_keywords = ['great place', 'highly recommend', 'will be back', 'love this place']
-
+    # 3. Filter out generic/spam reviews and 4. prefer reviews that mention specific
+    # food/features, in one pass over each lowercased review
+    scored_reviews = []
     for review in meaningful_reviews:
         text = review.get('review', '').lower()
         # Skip if too generic
-        if not any(spam in text for spam in spam_keywords):
-            quality_reviews.append(review)
-
-    # 4. Prefer reviews that mention specific food/features
-    feature_keywords = [
-        'pizza', 'pasta', 'sauce', 'taste', 'flavor', 'fresh', 'spicy', 'sweet',
-        'atmosphere', 'service', 'staff', 'ambiance', 'quiet', 'romantic',
-        'family', 'kids', 'parking', 'location', 'price', 'value'
-    ]
-
-    scored_reviews = []
-    for review in quality_reviews:
-        text = review.get('review', '').lower()
-        score = sum(1 for keyword in feature_keywords if keyword in text)
+        if any(spam in text for spam in SPAM_KEYWORDS):
+            continue
+        score = sum(1 for keyword in FEATURE_KEYWORDS if keyword in text)
         scored_reviews.append((score, review))
 
     # Sort by feature score and take top reviews
@@ -64,9 +67,8 @@ def filter_useful_tips(tips: List[str], limit: int = 5) -> List[str]:
     meaningful_tips = [tip for tip in tips if len(tip.split()) >= 3]
 
     # Prefer tips with specific food mentions
-    food_keywords = ['pizza', 'coffee', 'burger', 'salad', 'soup', 'dessert', 'drink']
     food_tips = [tip for tip in meaningful_tips
-                 if any(food in tip.lower() for food in food_keywords)]
+                 if any(food in tip.lower() for food in FOOD_KEYWORDS)]
 
     # Combine food tips with general tips
     if food_tips:
@@ -83,18 +85,15 @@ def extract_sentiment_keywords(reviews: List[Dict]) -> List[str]:
     positive_words = []
     negative_words = []
 
-    # Positive sentiment keywords
-    pos_keywords = ['delicious', 'amazing', 'excellent', 'perfect', 'fresh', 'tasty', 'flavorful', 'crispy']
-    neg_keywords = ['terrible', 'awful', 'bland', 'overpriced', 'slow', 'rude', 'cold', 'dry']
-
     for review in reviews:
-        text = review.get('review', '').lower()
         stars = review.get('stars', 0)
 
         if stars >= 4:  # Positive reviews
-            positive_words.extend([word for word in pos_keywords if word in text])
+            text = review.get('review', '').lower()
+            positive_words.extend([word for word in POSITIVE_KEYWORDS if word in text])
         elif stars <= 2:  # Negative reviews (use sparingly)
-            negative_words.extend([word for word in neg_keywords if word in text])
+            text = review.get('review', '').lower()
+            negative_words.extend([word for word in NEGATIVE_KEYWORDS if word in text])
 
     # Count frequency and return most common
     pos_counter = Counter(positive_words)
@@ -177,32 +176,35 @@ def generate_enhanced_description(restaurant: Dict[str, Any]) -> Dict[str, str]:
         'search_text': search_text
     }
 
+def enhance_restaurant(restaurant: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the enhanced description and search text to a restaurant record."""
+    enhanced = generate_enhanced_description(restaurant)
+    restaurant['description'] = enhanced['description']
+    restaurant['search_text'] = enhanced['search_text']
+    return restaurant
+
 def main():
     """Process restaurants and add enhanced descriptions."""
+    parser = argparse.ArgumentParser(description="Add enhanced descriptions to restaurants")
+    parser.add_argument('--input', default='yelp/restaurants.json',
+                        help="JSON array, or JSONL (one restaurant per line) to stream with bounded memory")
+    parser.add_argument('--output', default='yelp/restaurants_smart_enhanced.json',
+                        help="Written incrementally, as JSONL if it ends in .jsonl")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Restaurants per worker task")
+    args = parser.parse_args()
 
-    # Load original data
-    with open('yelp/restaurants.json', 'r', encoding='utf-8') as f:
-        restaurants = json.load(f)
-
-    print(f"Processing {len(restaurants)} restaurants with enhanced filtering...")
-
-    # Add enhanced descriptions
-    for i, restaurant in enumerate(restaurants):
-        enhanced = generate_enhanced_description(restaurant)
-        restaurant['description'] = enhanced['description']
-        restaurant['search_text'] = enhanced['search_text']
-
-        if (i + 1) % 100 == 0:
-            print(f"Processed {i + 1} restaurants...")
+    print(f"Processing {args.input} with enhanced filtering...")
 
-    # Save enhanced version
-    with open('yelp/restaurants_smart_enhanced.json', 'w', encoding='utf-8') as f:
-        json.dump(restaurants, f, ensure_ascii=False, indent=2)
+    # Add enhanced descriptions and save the enhanced version as results come in
+    _, sample = process_records(args.input, args.output, enhance_restaurant,
+                                workers=args.workers, chunk_size=args.chunk_size)
 
-    print("✅ Created restaurants_smart_enhanced.json with intelligent review filtering")
+    print(f"✅ Created {args.output} with intelligent review filtering")
 
     # Show sample
-    sample = restaurants[0]
+    if not sample:
+        return
     print(f"\n📝 Sample enhanced description for '{sample['name']}':")
     print(f"Description: {sample['description'][:200]}...")
     print(f"Search text: {sample['search_text'][:200]}...")
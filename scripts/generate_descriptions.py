@@ -2,11 +2,14 @@
 """
 Generate comprehensive descriptions for restaurants to enable similarity search.
 Combines name, categories, ambiences, location, and reviews into searchable text.
+Streams JSONL input through a process pool when the input or output path ends in .jsonl.
 """
 
-import json
+import argparse
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from record_stream import process_records
 
 def generate_restaurant_description(restaurant: Dict[str, Any]) -> str:
     """Generate a comprehensive description for a restaurant."""
@@ -62,41 +65,45 @@ def generate_restaurant_description(restaurant: Dict[str, Any]) -> str:
 
     return description
 
-def process_restaurants_json(input_file: str, output_file: str):
-    """Process restaurants JSON and generate descriptions."""
-
-    with open(input_file, 'r', encoding='utf-8') as f:
-        restaurants = json.load(f)
+def describe_restaurant(restaurant: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the description and search text to a restaurant record."""
+    restaurant['description'] = generate_restaurant_description(restaurant)
 
-    print(f"Processing {len(restaurants)} restaurants...")
+    # Also create a shorter search text for embedding
+    search_text = f"{restaurant.get('name', '')} {', '.join(restaurant.get('categories', []))} {', '.join(restaurant.get('ambiences', []))}"
+    restaurant['search_text'] = search_text
+    return restaurant
 
-    # Generate descriptions
-    for restaurant in restaurants:
-        description = generate_restaurant_description(restaurant)
-        restaurant['description'] = description
+def process_restaurants_json(input_file: str, output_file: str,
+                             workers: Optional[int] = None, chunk_size: int = 64):
+    """Process restaurants JSON (or JSONL) and generate descriptions, writing results as they are ready."""
 
-        # Also create a shorter search text for embedding
-        search_text = f"{restaurant.get('name', '')} {', '.join(restaurant.get('categories', []))} {', '.join(restaurant.get('ambiences', []))}"
-        restaurant['search_text'] = search_text
+    print(f"Processing {input_file}...")
 
-    # Save enhanced data
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(restaurants, f, ensure_ascii=False, indent=2)
+    # Generate descriptions and save enhanced data
+    _, sample = process_records(input_file, output_file, describe_restaurant,
+                                workers=workers, chunk_size=chunk_size)
 
     print(f"Enhanced restaurants data saved to {output_file}")
 
     # Print sample description
-    if restaurants:
+    if sample:
         print("\nSample description:")
-        print(f"Name: {restaurants[0]['name']}")
-        print(f"Description: {restaurants[0]['description'][:200]}...")
+        print(f"Name: {sample['name']}")
+        print(f"Description: {sample['description'][:200]}...")
 
 if __name__ == "__main__":
-    input_file = "yelp/restaurants.json"
-    output_file = "yelp/restaurants_enhanced.json"
-
-    if not os.path.exists(input_file):
-        print(f"Error: {input_file} not found")
+    parser = argparse.ArgumentParser(description="Generate restaurant descriptions")
+    parser.add_argument('--input', default="yelp/restaurants.json",
+                        help="JSON array, or JSONL (one restaurant per line) to stream with bounded memory")
+    parser.add_argument('--output', default="yelp/restaurants_enhanced.json",
+                        help="Written incrementally, as JSONL if it ends in .jsonl")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Restaurants per worker task")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} not found")
         exit(1)
 
-    process_restaurants_json(input_file, output_file)
\ No newline at end of file
+    process_restaurants_json(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size)
\ No newline at end of file
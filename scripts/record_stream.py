@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Streaming processing of restaurant datasets.
+Records are read from JSONL (or a JSON array), processed in a process pool and written
+incrementally, so memory stays bounded for JSONL input of any size.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith('.jsonl')
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield records from a JSONL file line by line, or from a JSON array file (loaded whole)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if is_jsonl(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+class RecordWriter:
+    """
+    Write records one at a time as JSONL, or as a JSON array when the path ends in .json.
+    The JSON array is byte-for-byte what json.dump(records, f, ensure_ascii=False, indent=2) writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.jsonl = is_jsonl(path)
+        self.count = 0
+        self.first: Optional[Dict[str, Any]] = None
+
+    def __enter__(self) -> "RecordWriter":
+        self.file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, record: Dict[str, Any]):
+        if self.jsonl:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            # Strings never contain raw newlines in JSON, so this only indents the record's lines
+            item = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            self.file.write(('[\n  ' if self.count == 0 else ',\n  ') + item)
+        if self.first is None:
+            self.first = record
+        self.count += 1
+
+    def __exit__(self, *exc_info):
+        if not self.jsonl:
+            self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+
+def _process_chunk(func: Callable[[Dict[str, Any]], Dict[str, Any]],
+                   records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [func(record) for record in records]
+
+def process_records(input_path: str,
+                    output_path: str,
+                    func: Callable[[Dict[str, Any]], Dict[str, Any]],
+                    workers: Optional[int] = None,
+                    chunk_size: int = 64) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    Apply func (a module-level function) to every record in a process pool and write
+    the results in input order. Returns (rows written, first output record).
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    records = iter_records(input_path)
+
+    with RecordWriter(output_path) as writer, ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def write_oldest():
+            for record in pending.popleft().result():
+                writer.write(record)
+                if writer.count % 1000 == 0:
+                    print(f"Processed {writer.count} restaurants...")
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(_process_chunk, func, chunk))
+            # Only a bounded number of chunks is held, however large the input is
+            if len(pending) >= 2 * workers:
+                write_oldest()
+        while pending:
+            write_oldest()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {writer.count} restaurants in {elapsed:.1f}s ({writer.count / elapsed:.1f} rows/sec)")
+    return writer.count, writer.first
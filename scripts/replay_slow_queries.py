@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Replay a slow-query log against the current build and diff latencies and result ids.
+"search" records are replayed through RestaurantSearchService.search_restaurants with the
+logged filters and limit, "chat" records through the agent's _handle_user_message in this
+process. The search and translation caches are disabled, so every replay does the full work.
+Chat records logged in proxy mode include the HTTP hop to the ADK server, so their ids are
+compared but their latencies are reported separately instead of diffed.
+The vector backend and models are picked from the environment, as in the server.
+
+Usage: python scripts/replay_slow_queries.py slow_queries.jsonl [slow_queries.jsonl.1 ...] [--repeat 3] [--output diff.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterator, List
+
+# Replays must not hit caches or log themselves
+os.environ["TRANSLATION_CACHE_PATH"] = ""
+os.environ["TRANSLATION_CACHE_SIZE"] = "0"
+os.environ["SLOW_QUERY_LOG_PATH"] = ""
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from book_agent import restaurant_search
+from book_agent.metrics import trace_stages
+from book_agent.restaurant_search import RestaurantSearchService, SearchFilters
+
+def read_records(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Yield slow-query records from JSONL files, rotated ones included."""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def is_comparable(record: Dict[str, Any]) -> bool:
+    """Whether the logged latency covers the same work as the in-process replay."""
+    # Searches are timed inside the agent in either mode; proxy chat turns add the ADK hop
+    return record["source"] == "search" or record.get("agent_mode") == "inprocess"
+
+def run_once(record: Dict[str, Any], service: RestaurantSearchService) -> Dict[str, Any]:
+    """Replay one record and return its latency, stage timings and result ids."""
+    from book_agent.agent import _handle_user_message
+
+    with trace_stages() as trace:
+        start = time.perf_counter()
+        if record["source"] == "search":
+            filters = SearchFilters(**record["filters"]) if record.get("filters") else None
+            results = service.search_restaurants(record["query"], filters=filters, limit=record.get("limit", 5))
+            result_ids = [restaurant.get('restaurant_id') for restaurant in results]
+        else:
+            items = _handle_user_message(record["query"])
+            result_ids = [item.get("id") for item in items if item.get("type") == "Restaurant Option"]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    return {
+        "total_ms": elapsed_ms,
+        "stages_ms": trace.stages_ms(),
+        "result_ids": result_ids,
+        "translated_query": trace.details.get("translated_query"),
+    }
+
+def replay(record: Dict[str, Any], service: RestaurantSearchService, repeat: int) -> Dict[str, Any]:
+    """Replay a record `repeat` times and diff the median run against the logged one."""
+    runs = sorted((run_once(record, service) for _ in range(repeat)), key=lambda run: run["total_ms"])
+    new = runs[len(runs) // 2]
+    old_ms = record["total_ms"]
+    comparable = is_comparable(record)
+    return {
+        "source": record["source"],
+        "query": record["query"],
+        "logged_at": record.get("ts"),
+        "agent_mode": record.get("agent_mode"),
+        "comparable": comparable,
+        "old_ms": old_ms,
+        "new_ms": round(new["total_ms"], 3),
+        "change_pct": round((new["total_ms"] - old_ms) / old_ms * 100, 1) if old_ms and comparable else None,
+        "old_translated_query": record.get("translated_query"),
+        "new_translated_query": new["translated_query"],
+        "ids_match": record.get("result_ids") == new["result_ids"],
+        "old_result_ids": record.get("result_ids"),
+        "new_result_ids": new["result_ids"],
+        "old_stages_ms": record.get("stages_ms", {}),
+        "new_stages_ms": new["stages_ms"],
+    }
+
+def stage_means(diffs: List[Dict[str, Any]], key: str) -> Dict[str, float]:
+    stages: Dict[str, List[float]] = {}
+    for diff in diffs:
+        for stage, ms in diff[key].items():
+            stages.setdefault(stage, []).append(ms)
+    return {stage: statistics.mean(values) for stage, values in stages.items()}
+
+def print_diffs(diffs: List[Dict[str, Any]]):
+    print(f"{'source':<7} {'old ms':>9} {'new ms':>9} {'change':>8} {'ids':>5}  query")
+    for diff in diffs:
+        change = f"{diff['change_pct']:+.1f}%" if diff['change_pct'] is not None else "n/a"
+        print(f"{diff['source']:<7} {diff['old_ms']:>9.1f} {diff['new_ms']:>9.1f} {change:>8} "
+              f"{'same' if diff['ids_match'] else 'DIFF':>5}  {diff['query'][:60]}")
+
+def print_report(diffs: List[Dict[str, Any]]):
+    comparable = [diff for diff in diffs if diff['comparable']]
+    proxy = [diff for diff in diffs if not diff['comparable']]
+    changed = sum(1 for diff in diffs if not diff['ids_match'])
+
+    if comparable:
+        print_diffs(comparable)
+        old = sorted(diff['old_ms'] for diff in comparable)
+        new = sorted(diff['new_ms'] for diff in comparable)
+        print(f"\n{len(comparable)} comparable records: median {statistics.median(old):.1f} -> "
+              f"{statistics.median(new):.1f} ms, max {old[-1]:.1f} -> {new[-1]:.1f} ms")
+    if proxy:
+        print(f"\n{len(proxy)} chat records logged in proxy mode; their old latency includes the ADK hop "
+              f"and is not compared:")
+        print_diffs(proxy)
+    print(f"\nResult ids changed for {changed} of {len(diffs)} records")
+
+    old_stages = stage_means(comparable, "old_stages_ms")
+    new_stages = stage_means(comparable, "new_stages_ms")
+    if not old_stages and not new_stages:
+        return
+    print(f"\n{'stage':<20} {'old mean ms':>12} {'new mean ms':>12}")
+    for stage in sorted(set(old_stages) | set(new_stages)):
+        old_text = f"{old_stages[stage]:.2f}" if stage in old_stages else "-"
+        new_text = f"{new_stages[stage]:.2f}" if stage in new_stages else "-"
+        print(f"{stage:<20} {old_text:>12} {new_text:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a slow-query log and diff latencies and result ids")
+    parser.add_argument('logs', nargs='+', help="Slow-query JSONL files")
+    parser.add_argument('--source', choices=["search", "chat"], help="Replay only records of this source")
+    parser.add_argument('--limit', type=int, default=0, help="Replay at most N records (0 = all)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per record; the median run is compared")
+    parser.add_argument('--output', help="Write the per-record diff as JSON here")
+    args = parser.parse_args()
+
+    records = [record for record in read_records(args.logs)
+               if args.source is None or record["source"] == args.source]
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print("No records to replay")
+        return
+
+    service = RestaurantSearchService(cache_size=0)
+    # Chat replays reach the search through the global service
+    restaurant_search._search_service = service
+
+    # Load the models before timing
+    service.search_restaurants(records[0]["query"], limit=1)
+
+    diffs = [replay(record, service, args.repeat) for record in records]
+    print_report(diffs)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(diffs, f, ensure_ascii=False, indent=2)
+        print(f"\nDiff written to {args.output}")
+
+if __name__ == "__main__":
+    main()
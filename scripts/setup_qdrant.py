@@ -2,27 +2,122 @@
 """
 Set up Qdrant vector database and create embeddings for restaurant search.
 Uses Hugging Face sentence-transformers for generating embeddings.
+Re-running it only re-embeds new or changed restaurants and deletes removed ones.
 """
 
+import argparse
+import hashlib
 import json
 import logging
-from typing import List, Dict, Any
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import Batch, Distance, VectorParams, PayloadSchemaType, PointIdsList
 import numpy as np
 from tqdm import tqdm
 
+from record_stream import iter_records
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+from book_agent.vector_backend import save_numpy_index, write_index_version
+from book_agent.embedding_model import (load_embedding_model, embedding_model_id, check_embedding_mode,
+                                        EMBEDDING_BACKEND, EMBEDDING_MODE, EMBEDDING_MODELS, EMBEDDING_COLLECTIONS)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Payload fields used by SearchFilters, indexed so filtered searches stay fast
+PAYLOAD_INDEXES = {
+    "city": PayloadSchemaType.KEYWORD,
+    "stars": PayloadSchemaType.FLOAT,
+    "categories": PayloadSchemaType.KEYWORD,
+    "good_for_kids": PayloadSchemaType.BOOL,
+    "dogs_allowed": PayloadSchemaType.BOOL,
+}
+
+# Ingestion pipeline settings
+ENCODE_BATCH_SIZE = 64
+UPLOAD_BATCH_SIZE = 256
+UPLOAD_WORKERS = 4
+# Records diffed and upserted per chunk, so indexing memory does not grow with the catalog
+INDEX_CHUNK_SIZE = 4096
+
+# Point ids are derived from restaurant ids, so reordering the data keeps every point's id
+POINT_ID_NAMESPACE = uuid.UUID("5b0e6a3c-1f0d-4c8e-9a51-2f6c8d7b4e10")
+
+def point_id(restaurant_id: str) -> str:
+    """Return the stable Qdrant point id of a restaurant."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, restaurant_id))
+
+def content_hash(text: str, payload: Dict[str, Any], model_id: str) -> str:
+    """
+    Hash everything a point is built from, so changed restaurants can be detected.
+    model_id (see embedding_model_id) covers the backend and ONNX file, so switching
+    backends re-embeds every restaurant instead of mixing vectors in one collection.
+    """
+    content = json.dumps({"model": model_id, "text": text, "payload": payload},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def fallback_restaurant_id(restaurant: Dict[str, Any]) -> str:
+    """Derive an id from a restaurant's identity, for records without an id."""
+    identity = "|".join(str(restaurant.get(field, '')) for field in ('name', 'address', 'city', 'state'))
+    return f"rest_{hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]}"
+
+def build_payload(restaurant: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the search payload stored with each restaurant vector.
+    Records without an id get one derived from their name and address, so inserting
+    a record does not shift the ids of later ones.
+    """
+    return {
+        "restaurant_id": restaurant.get('id') or fallback_restaurant_id(restaurant),
+        "name": restaurant.get('name', ''),
+        "categories": restaurant.get('categories', []),
+        "city": restaurant.get('city', ''),
+        "state": restaurant.get('state', ''),
+        "stars": restaurant.get('stars', 0),
+        "review_count": restaurant.get('review_count', 0),
+        "description": restaurant.get('description', ''),
+        "search_text": restaurant.get('search_text', ''),
+        "location": restaurant.get('location', {}),
+        "ambiences": restaurant.get('ambiences', []),
+        "good_for_meals": restaurant.get('good_for_meals', []),
+        "good_for_kids": restaurant.get('good_for_kids', False),
+        "dogs_allowed": restaurant.get('dogs_allowed', False),
+        "address": restaurant.get('address', ''),
+    }
+
+def build_embedding_text(restaurant: Dict[str, Any]) -> str:
+    """Return the text embedded for a restaurant."""
+    # Use the enhanced description for embedding
+    text = restaurant.get('description', '') or restaurant.get('search_text', '')
+    if not text:
+        # Fallback: create basic text from name and categories
+        name = restaurant.get('name', '')
+        categories = ', '.join(restaurant.get('categories', []))
+        text = f"{name} {categories}"
+    return text
+
 class RestaurantVectorDB:
     def __init__(self,
                  host: str = "localhost",
                  port: int = 6333,
-                 model_name: str = "all-MiniLM-L6-v2"):
+                 model_name: Optional[str] = None,
+                 embedding_backend: str = EMBEDDING_BACKEND,
+                 embedding_mode: str = EMBEDDING_MODE):
         """Initialize Qdrant client and embedding model."""
+        check_embedding_mode(embedding_mode)
+        model_name = model_name or EMBEDDING_MODELS[embedding_mode]
+        self.model_name = model_name
+        self.model_id = embedding_model_id(model_name, embedding_backend)
 
         # Initialize Qdrant client (will use in-memory if server not available)
         try:
@@ -33,26 +128,33 @@ class RestaurantVectorDB:
             logger.info("Using in-memory Qdrant client")
             self.client = QdrantClient(":memory:")
 
-        # Initialize embedding model (force CPU to avoid GPU compatibility issues)
+        # Initialize embedding model (CPU only, fp32 PyTorch or quantized ONNX)
         logger.info(f"Loading embedding model: {model_name}")
-        import torch
-        device = "cpu"  # Force CPU usage
-        self.model = SentenceTransformer(model_name, device=device)
+        self.model = load_embedding_model(model_name, backend=embedding_backend)
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
         logger.info(f"Embedding dimension: {self.embedding_dim}")
-        logger.info(f"Using device: {device}")
+        logger.info(f"Using embedding backend: {embedding_backend}")
 
-        self.collection_name = "restaurants"
+        # The multilingual mode is indexed into its own collection
+        self.collection_name = EMBEDDING_COLLECTIONS[embedding_mode]
+        logger.info(f"Using {embedding_mode} embedding mode, collection '{self.collection_name}'")
 
-    def create_collection(self):
-        """Create Qdrant collection for restaurants."""
+    def create_collection(self, recreate: bool = True):
+        """Create Qdrant collection for restaurants. With recreate=False an existing collection is kept."""
         try:
-            # Delete existing collection if it exists
-            try:
+            if self.client.collection_exists(self.collection_name):
+                if not recreate:
+                    vector_size = self.client.get_collection(self.collection_name).config.params.vectors.size
+                    if vector_size != self.embedding_dim:
+                        raise ValueError(f"Collection '{self.collection_name}' has {vector_size}-dim vectors but the "
+                                         f"model has {self.embedding_dim}; run with --recreate")
+                    logger.info(f"Updating existing collection '{self.collection_name}'")
+                    self.create_payload_indexes()
+                    return
+
+                # Delete existing collection
                 self.client.delete_collection(self.collection_name)
                 logger.info("Deleted existing collection")
-            except:
-                pass
 
             # Create new collection
             self.client.create_collection(
@@ -64,85 +166,203 @@ class RestaurantVectorDB:
             )
             logger.info(f"Created collection '{self.collection_name}'")
 
+            self.create_payload_indexes()
+
         except Exception as e:
             logger.error(f"Error creating collection: {e}")
             raise
 
-    def generate_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
-        """Generate embeddings for a list of texts."""
-        logger.info(f"Generating embeddings for {len(texts)} texts")
-
-        embeddings = []
-        for i in tqdm(range(0, len(texts), batch_size), desc="Generating embeddings"):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = self.model.encode(batch, convert_to_numpy=True)
-            embeddings.extend(batch_embeddings)
-
-        return np.array(embeddings)
-
-    def index_restaurants(self, restaurants_file: str):
-        """Index restaurants from JSON file into Qdrant."""
-
-        # Load restaurants
-        with open(restaurants_file, 'r', encoding='utf-8') as f:
-            restaurants = json.load(f)
-
-        logger.info(f"Loading {len(restaurants)} restaurants")
-
-        # Prepare texts for embedding
-        texts = []
-        for restaurant in restaurants:
-            # Use the enhanced description for embedding
-            text = restaurant.get('description', '') or restaurant.get('search_text', '')
-            if not text:
-                # Fallback: create basic text from name and categories
-                name = restaurant.get('name', '')
-                categories = ', '.join(restaurant.get('categories', []))
-                text = f"{name} {categories}"
-            texts.append(text)
-
-        # Generate embeddings
-        embeddings = self.generate_embeddings(texts)
-
-        # Prepare points for Qdrant
-        points = []
-        for i, (restaurant, embedding) in enumerate(zip(restaurants, embeddings)):
-            point = PointStruct(
-                id=i,
-                vector=embedding.tolist(),
-                payload={
-                    "restaurant_id": restaurant.get('id', f'rest_{i}'),
-                    "name": restaurant.get('name', ''),
-                    "categories": restaurant.get('categories', []),
-                    "city": restaurant.get('city', ''),
-                    "state": restaurant.get('state', ''),
-                    "stars": restaurant.get('stars', 0),
-                    "review_count": restaurant.get('review_count', 0),
-                    "description": restaurant.get('description', ''),
-                    "search_text": restaurant.get('search_text', ''),
-                    "location": restaurant.get('location', {}),
-                    "ambiences": restaurant.get('ambiences', []),
-                    "good_for_meals": restaurant.get('good_for_meals', []),
-                    "good_for_kids": restaurant.get('good_for_kids', False),
-                    "dogs_allowed": restaurant.get('dogs_allowed', False),
-                    "address": restaurant.get('address', ''),
-                }
+    def create_payload_indexes(self):
+        """Create payload indexes for the fields used in search filters."""
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema
             )
-            points.append(point)
-
-        # Upload to Qdrant
-        logger.info("Uploading points to Qdrant...")
-        self.client.upload_points(
+            logger.info(f"Created payload index on '{field_name}'")
+
+    def iter_embedding_batches(self, texts: List[str],
+                               batch_size: int = ENCODE_BATCH_SIZE) -> Iterator[Tuple[List[int], np.ndarray]]:
+        """Yield (indices, embeddings) batches, encoding texts sorted by length so batches pad little."""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        for start in tqdm(range(0, len(order), batch_size), desc="Generating embeddings"):
+            indices = order[start:start + batch_size]
+            embeddings = self.model.encode([texts[i] for i in indices], batch_size=len(indices),
+                                           convert_to_numpy=True)
+            yield indices, embeddings
+
+    def upsert_documents(self,
+                         document_ids: List[str],
+                         documents: Dict[str, Tuple[str, Dict[str, Any]]],
+                         encode_batch_size: int = ENCODE_BATCH_SIZE,
+                         upload_batch_size: int = UPLOAD_BATCH_SIZE,
+                         upload_workers: int = UPLOAD_WORKERS) -> float:
+        """
+        Embed and upsert documents as a pipeline: chunks are uploaded by worker threads
+        while the next batch encodes, and only a bounded number of chunks is held in memory.
+        Vectors are collected in one preallocated float32 buffer per upload chunk, which is
+        converted to lists once per chunk. Returns the seconds spent encoding.
+        """
+        encode_seconds = 0.0
+        texts = [documents[document_id][0] for document_id in document_ids]
+        uploads = deque()
+
+        # Rows of the chunk being filled; reused once a chunk has been converted and submitted
+        buffer = np.empty((upload_batch_size, self.embedding_dim), dtype=np.float32)
+        chunk_ids: List[str] = []
+
+        with ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="qdrant-upload") as executor:
+            def submit():
+                count = len(chunk_ids)
+                batch = Batch(ids=list(chunk_ids), vectors=buffer[:count].tolist(),
+                              payloads=[documents[document_id][1] for document_id in chunk_ids])
+                uploads.append(executor.submit(self.client.upsert, collection_name=self.collection_name,
+                                               points=batch, wait=True))
+                chunk_ids.clear()
+                # Wait for the oldest chunk once enough are queued, so memory stays flat for any catalog size
+                while len(uploads) > 2 * upload_workers:
+                    uploads.popleft().result()
+
+            batches = self.iter_embedding_batches(texts, encode_batch_size)
+            while True:
+                encode_start = time.perf_counter()
+                batch = next(batches, None)
+                encode_seconds += time.perf_counter() - encode_start
+                if batch is None:
+                    break
+
+                for i, embedding in zip(*batch):
+                    buffer[len(chunk_ids)] = embedding
+                    chunk_ids.append(document_ids[i])
+                    if len(chunk_ids) == upload_batch_size:
+                        submit()
+
+            if chunk_ids:
+                submit()
+            while uploads:
+                uploads.popleft().result()
+
+        return encode_seconds
+
+    def fetch_content_hashes(self, document_ids: List[str]) -> Dict[Any, Optional[str]]:
+        """Return the content hash stored with each of document_ids that is in the collection."""
+        records = self.client.retrieve(
             collection_name=self.collection_name,
-            points=points
+            ids=document_ids,
+            with_payload=["content_hash"],
+            with_vectors=False,
         )
+        return {record.id: (record.payload or {}).get("content_hash") for record in records}
+
+    def iter_point_ids(self, page_size: int = 1024) -> Iterator[Any]:
+        """Yield the id of every point in the collection."""
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            for record in records:
+                yield record.id
+            if offset is None:
+                return
+
+    def index_restaurants(self, restaurants_file: str, numpy_index_dir: Optional[str] = None,
+                          chunk_size: int = INDEX_CHUNK_SIZE, **pipeline_options):
+        """
+        Sync the collection with the restaurants in a JSON file, optionally also writing a NumPy index.
+        Records are streamed in chunks of chunk_size; each chunk is diffed against the content hashes
+        stored in the collection, and only new or changed restaurants are embedded and upserted.
+        Restaurants missing from the file are deleted at the end. Apart from the chunk, memory holds
+        only the point ids seen, which removal needs. JSONL input is read line by line; a JSON array
+        is loaded whole. pipeline_options are passed to upsert_documents.
+        """
+        start = time.perf_counter()
+        encode_seconds = 0.0
+        # Point ids in file order
+        seen: Dict[str, None] = {}
+        changed_count = 0
+
+        records = iter_records(restaurants_file)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            # Desired state of the chunk: stable point id -> (text to embed, payload with content hash)
+            documents = {}
+            for restaurant in chunk:
+                payload = build_payload(restaurant)
+                text = build_embedding_text(restaurant)
+                payload["content_hash"] = content_hash(text, payload, self.model_id)
+                document_id = point_id(payload["restaurant_id"])
+                if document_id in seen:
+                    logger.warning(f"Duplicate restaurant id '{payload['restaurant_id']}', keeping the last one")
+                seen[document_id] = None
+                documents[document_id] = (text, payload)
+
+            # Embed and upsert only what changed
+            existing = self.fetch_content_hashes(list(documents))
+            changed = [document_id for document_id, (_, payload) in documents.items()
+                       if existing.get(document_id) != payload["content_hash"]]
+            if changed:
+                encode_seconds += self.upsert_documents(changed, documents, **pipeline_options)
+            changed_count += len(changed)
+            logger.info(f"Synced {len(seen)} restaurants, {changed_count} new or changed so far")
+
+        # Delete after upserting, so searches never see a gap
+        removed = [existing_id for existing_id in self.iter_point_ids() if existing_id not in seen]
+        for i in range(0, len(removed), chunk_size):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=removed[i:i + chunk_size]),
+                wait=True
+            )
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"{changed_count} new or changed, {len(seen) - changed_count} unchanged, "
+                    f"{len(removed)} removed restaurants")
+        if changed_count:
+            logger.info(f"Embedded and uploaded {changed_count} restaurants in {elapsed:.1f}s "
+                        f"({changed_count / elapsed:.1f} docs/sec, encoding {encode_seconds:.1f}s)")
+
+        # Bump the index version so running servers drop their cached results
+        if changed_count or removed:
+            version = write_index_version(self.client, self.collection_name)
+            logger.info(f"Index version of '{self.collection_name}' is now {version}")
 
-        logger.info(f"Successfully indexed {len(points)} restaurants")
+        logger.info(f"Successfully indexed {len(seen)} restaurants")
+
+        # Write the in-process NumPy index used when Qdrant is unavailable
+        if numpy_index_dir:
+            self.write_numpy_index(numpy_index_dir, list(seen))
 
         # Print collection info
         collection_info = self.client.get_collection(self.collection_name)
         logger.info(f"Collection info: {collection_info}")
 
+    def write_numpy_index(self, numpy_index_dir: str, point_ids: List[str], batch_size: int = 256):
+        """Write the NumPy index from the vectors stored in Qdrant, in point_ids order."""
+        embeddings = []
+        payloads = []
+        for i in range(0, len(point_ids), batch_size):
+            records = {record.id: record for record in self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=point_ids[i:i + batch_size],
+                with_payload=True,
+                with_vectors=True,
+            )}
+            for document_id in point_ids[i:i + batch_size]:
+                embeddings.append(records[document_id].vector)
+                payloads.append(records[document_id].payload)
+
+        save_numpy_index(numpy_index_dir, np.array(embeddings, dtype=np.float32), payloads)
+        logger.info(f"Wrote NumPy index to {numpy_index_dir}")
+
     def search_restaurants(self,
                           query: str,
                           limit: int = 5,
@@ -172,16 +392,35 @@ class RestaurantVectorDB:
 
 def main():
     """Main function to set up Qdrant and index restaurants."""
+    parser = argparse.ArgumentParser(description="Set up Qdrant and index restaurants")
+    parser.add_argument('--restaurants-file', default="yelp/restaurants_smart_enhanced.json",
+                        help="JSON array or JSONL, e.g. the output of enhanced_description_generator.py")
+    parser.add_argument('--numpy-dir', default=None,
+                        help="Also write a NumPy index here (e.g. yelp/numpy_index) for the in-process backend")
+    parser.add_argument('--embedding-mode', default=EMBEDDING_MODE, choices=list(EMBEDDING_MODELS),
+                        help="translate: English model, queries are translated first; "
+                             "multilingual: multilingual model, Korean queries are embedded directly")
+    parser.add_argument('--recreate', action='store_true',
+                        help="Drop and rebuild the collection instead of updating it in place")
+    parser.add_argument('--chunk-size', type=int, default=INDEX_CHUNK_SIZE,
+                        help="Records read, diffed and upserted at a time")
+    parser.add_argument('--encode-batch-size', type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument('--upload-batch-size', type=int, default=UPLOAD_BATCH_SIZE)
+    parser.add_argument('--upload-workers', type=int, default=UPLOAD_WORKERS)
+    args = parser.parse_args()
 
     # Initialize vector DB
-    vector_db = RestaurantVectorDB()
+    vector_db = RestaurantVectorDB(embedding_mode=args.embedding_mode)
 
-    # Create collection
-    vector_db.create_collection()
+    # Create the collection, or keep the existing one for an incremental update
+    vector_db.create_collection(recreate=args.recreate)
 
     # Index restaurants with smart filtering
-    restaurants_file = "yelp/restaurants_smart_enhanced.json"
-    vector_db.index_restaurants(restaurants_file)
+    vector_db.index_restaurants(args.restaurants_file, numpy_index_dir=args.numpy_dir,
+                                chunk_size=args.chunk_size,
+                                encode_batch_size=args.encode_batch_size,
+                                upload_batch_size=args.upload_batch_size,
+                                upload_workers=args.upload_workers)
 
     # Test search
     logger.info("\n=== Testing search functionality ===")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Pre-warm the persistent translation cache from a query log.
+The log is either plain text with one query per line, or JSONL with a "query" or "text" field.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Iterator
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from book_agent.translation_service import get_translation_service
+
+def read_queries(log_file: str) -> Iterator[str]:
+    """Yield queries from a plain text or JSONL log."""
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                    yield record.get('query') or record.get('text') or ''
+                    continue
+                except json.JSONDecodeError:
+                    pass
+            yield line
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('log_file', help='Query log to read')
+    args = parser.parse_args()
+
+    service = get_translation_service()
+    translated = service.warm_cache(read_queries(args.log_file))
+
+    print(f"Translated {translated} new queries")
+    print(f"Cache stats: {service.cache.stats()}")
+
+if __name__ == "__main__":
+    main()
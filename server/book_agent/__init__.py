@@ -1 +1,13 @@
-from . import agent
\ No newline at end of file
+"""
+Restaurant booking agent. Google ADK loads the agent from book_agent.agent; the submodule
+is imported on first use so that tools such as scripts/setup_qdrant.py can use the search
+and indexing helpers without Google ADK installed.
+"""
+
+import importlib
+
+def __getattr__(name):
+    if name == "agent":
+        # import_module rather than "from . import agent", which would look the attribute up here again
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,71 +1,74 @@
 from typing_extensions import override
-from typing import Callable, Any, AsyncGenerator, Optional
+from typing import Callable, Any, AsyncGenerator, Iterable, Iterator, Optional
 from google.adk.agents import BaseAgent, InvocationContext
+from google.adk.agents.run_config import StreamingMode
 from google.adk.events import Event
 from google.genai.types import ModelContent
 
+import inspect
 import json
-from .restaurant_search import search_restaurants_by_query, format_restaurant_response
+import logging
+from .restaurant_search import search_restaurants_by_query, iter_restaurant_response
+from .worker_pool import get_worker_pool
+from .intent_router import IntentMatch, classify_intent
+from .metrics import STAGE_SECONDS, AGENT_METRICS_PORT, start_metrics_server, timed_iter
 
-def _handle_greetings_flow(user_message: str) -> list:
+logger = logging.getLogger(__name__)
+
+def _handle_greetings_flow(user_message: str, intent: Optional[IntentMatch] = None) -> Iterable[dict]:
     """Handle greetings and initial user interaction."""
     # Handle empty messages
     if not user_message or user_message.strip() == "":
         return [{"type": "Message", "text": "안녕하세요! 레스토랑 추천이나 예약을 도와드릴 수 있습니다. 무엇을 도와드릴까요?"}]
 
-    # Greeting keywords in multiple languages
-    greeting_keywords = [
-        "안녕", "안녕하세요", "안녕하십니까", "처음", "시작", "헬로",
-        "hello", "hi", "hey", "good morning", "good afternoon", "good evening",
-        "시작해", "시작할게", "도움말", "help"
-    ]
-
-    user_lower = user_message.lower().strip()
+    # Scan the message once; every flow below reuses the result
+    if intent is None:
+        with STAGE_SECONDS.time(stage="routing"):
+            intent = classify_intent(user_message)
 
     # Check for greetings
-    if any(keyword in user_lower for keyword in greeting_keywords):
+    if intent.has("greeting"):
         return [{"type": "Message", "text": "안녕하세요! 저는 레스토랑 추천과 예약을 도와드리는 AI 어시스턴트입니다. 🍽️\n\n다음과 같은 도움을 드릴 수 있습니다:\n• 음식 종류나 분위기에 따른 레스토랑 추천\n• 레스토랑 예약 관리\n\n어떤 종류의 음식이나 레스토랑을 찾고 계신가요?"}]
 
     # If not a greeting, try other flows
-    return _handle_restaurant_recommendation_flow(user_message)
+    return _handle_restaurant_recommendation_flow(user_message, intent)
 
-def _handle_restaurant_recommendation_flow(user_message: str) -> list:
+def _handle_restaurant_recommendation_flow(user_message: str, intent: Optional[IntentMatch] = None) -> Iterable[dict]:
     """Handle restaurant search and recommendation requests."""
-    search_keywords = ["추천해", "추천해줘", "알려줘", "찾아줘", "검색해", "추천받고싶어", "먹고싶어", "recommend", "find", "search"]
-    food_keywords = ["식당", "레스토랑", "맛집", "음식", "요리", "카페", "술집", "바", "restaurant", "food", "cafe", "bar"]
-    cuisine_keywords = ["이탈리아", "중국", "한국", "일본", "태국", "피자", "커피", "치킨", "italian", "chinese", "korean", "japanese", "thai", "pizza", "coffee", "chicken"]
+    if intent is None:
+        intent = classify_intent(user_message)
 
-    user_lower = user_message.lower()
-
-    has_search_intent = any(keyword in user_lower for keyword in search_keywords)
-    has_food_context = any(keyword in user_lower for keyword in food_keywords) or \
-                      any(keyword in user_lower for keyword in cuisine_keywords)
+    has_search_intent = intent.has("search")
+    has_food_context = intent.has("food") or intent.has("cuisine")
 
     if has_search_intent or (has_food_context and len(user_message) > 3):
-        # Use vector search to find restaurants
-        restaurants = search_restaurants_by_query(user_message, limit=3)
-        return format_restaurant_response(restaurants)
+        # Use vector search to find restaurants, lazily so a streaming run can emit items as they are ready
+        return _iter_restaurant_recommendations(user_message)
 
     # If not a recommendation request, try reservation flow
-    return _handle_restaurant_reservation_flow(user_message)
+    return _handle_restaurant_reservation_flow(user_message, intent)
 
-def _handle_restaurant_reservation_flow(user_message: str) -> list:
-    """Handle restaurant reservation requests."""
-    reservation_keywords = ["예약", "예약해", "예약해줘", "booking", "reserve", "reservation"]
+def _iter_restaurant_recommendations(user_message: str) -> Iterator[dict]:
+    """Search restaurants and yield the reply items one at a time."""
+    restaurants = search_restaurants_by_query(user_message, limit=3)
+    yield from timed_iter(iter_restaurant_response(restaurants), STAGE_SECONDS, stage="formatting")
 
-    user_lower = user_message.lower()
+def _handle_restaurant_reservation_flow(user_message: str, intent: Optional[IntentMatch] = None) -> Iterable[dict]:
+    """Handle restaurant reservation requests."""
+    if intent is None:
+        intent = classify_intent(user_message)
 
     # Check for reservation keywords
-    if any(keyword in user_lower for keyword in reservation_keywords):
+    if intent.has("reservation"):
         return [{"type": "Message", "text": "레스토랑 예약을 도와드리겠습니다! 다음 정보를 알려주세요:\n\n• 원하시는 레스토랑 이름\n• 예약 날짜와 시간\n• 인원수\n\n예: '홍콩반점 내일 저녁 7시 4명 예약해줘'"}]
 
     # Handle specific restaurant mentions for reservation
-    if "홍콩반점" in user_message:
+    if "홍콩반점" in intent.entities("restaurant_name"):
         return [
             {"type": "Reservation State", "title": "홍콩반점", "id": "222", "status": "생성"},
             {"type": "Message", "text": "홍콩반점 예약을 도와드리겠습니다. 예약 날짜와 시간, 그리고 인원수를 알려주세요."}
         ]
-    elif "모레" in user_message:
+    elif "모레" in intent.entities("relative_date"):
         return [
             {"type": "Reservation State", "title": "홍콩반점", "id": "222", "status": "생성", "datetime": "2025-09-09 12:30", "persons": 4},
             {"type": "Message", "text": "9월 9일 오후 12시 30분, 4명, 홍콩반점 예약을 진행할까요?"}
@@ -83,30 +86,72 @@ class SimpleAgent(BaseAgent):
     "Agent that wraps a user-provided function and executes it as part of the agent workflow."
     func: Callable[..., Any]
     input_key: Optional[str] = None
+    # Optional generator version of func; streaming runs emit each item it yields as a partial event
+    stream_func: Optional[Callable[..., Iterator[Any]]] = None
 
     @override
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         inputs = {self.input_key: ctx.user_content.parts[0].text} if self.input_key else {}
-        output = await self._maybe_await(self.func(**inputs))
-
+        if self.stream_func is not None and self._is_streaming(ctx):
+            output = []
+            async for item in self._iterate(self.stream_func(**inputs)):
+                output.append(item)
+                yield Event(author=self.name, invocation_id=ctx.invocation_id, partial=True,
+                            content=ModelContent(json.dumps([item], ensure_ascii=False)))
+        elif inspect.iscoroutinefunction(self.func):
+            output = await self.func(**inputs)
+        else:
+            # Blocking functions (embedding, translation, search) run on the worker pool
+            output = await self._maybe_await(await get_worker_pool().run(self.func, **inputs))
+
+        # The complete reply is always sent last, so non-streaming clients and the session history see one event
         yield Event(author=self.name, invocation_id=ctx.invocation_id,
                     content=ModelContent(json.dumps(output, ensure_ascii=False)))
 
+    @staticmethod
+    def _is_streaming(ctx: InvocationContext) -> bool:
+        return ctx.run_config is not None and ctx.run_config.streaming_mode not in (None, StreamingMode.NONE)
+
+    async def _iterate(self, items: Iterator[Any]) -> AsyncGenerator[Any, None]:
+        """Step a blocking iterator on the worker pool, yielding each item as soon as it is produced."""
+        done = object()
+        while True:
+            item = await get_worker_pool().run(next, items, done)
+            if item is done:
+                return
+            yield item
+
     async def _maybe_await(self, value):
         if callable(getattr(value, "__await__", None)):
             return await value
         return value
 
+ERROR_REPLY = {"type": "Message", "text": "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해 주세요."}
+
 def _handle_user_message(user_message: str) -> list:
     try:
-        return _handle_greetings_flow(user_message)
+        return list(_handle_greetings_flow(user_message))
     except Exception as e:
         # Fallback to simple response if any error occurs
-        print(f"Error in agent: {e}")
-        return [{"type": "Message", "text": "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해 주세요."}]
+        logger.error(f"Error in agent: {e}")
+        return [ERROR_REPLY]
+
+def _stream_user_message(user_message: str) -> Iterator[dict]:
+    """Yield the reply of _handle_user_message one item at a time."""
+    try:
+        yield from _handle_greetings_flow(user_message)
+    except Exception as e:
+        # Items already sent stay sent; finish the reply with the error message
+        logger.error(f"Error in agent: {e}")
+        yield ERROR_REPLY
 
 root_agent = SimpleAgent(name="book_agent",
                          func=_handle_user_message,
+                         stream_func=_stream_user_message,
                          input_key="user_message")
+
+# In proxy mode the agent runs inside the ADK api_server; serve its metrics from there
+if AGENT_METRICS_PORT:
+    start_metrics_server(AGENT_METRICS_PORT)
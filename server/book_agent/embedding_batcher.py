@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching of query embeddings.
+Concurrent callers are grouped into a single encode call on the embedding model.
+"""
+
+import os
+from typing import TYPE_CHECKING, List
+
+from .micro_batcher import MicroBatcher
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Batching settings (override with environment variables)
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "16"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5.0"))
+
+class EmbeddingBatcher(MicroBatcher):
+    """Collect concurrent queries for up to max_wait_ms or max_batch_size items and encode them together."""
+
+    def __init__(self,
+                 model,
+                 max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+                 max_wait_ms: float = EMBEDDING_MAX_WAIT_MS):
+        """Initialize the batcher for a SentenceTransformer-compatible model."""
+        self.model = model
+        super().__init__(self._encode_batch, max_batch_size=max_batch_size,
+                         max_wait_ms=max_wait_ms, name="embedding-batcher")
+
+    def encode(self, text: str) -> "np.ndarray":
+        """Return the embedding for a single text, batched with concurrent callers."""
+        return self.submit(text)
+
+    def _encode_batch(self, texts: List[str]) -> "np.ndarray":
+        return self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Loader for the sentence embedding model.
+Supports the default fp32 PyTorch model and a dynamically quantized int8 ONNX export of it,
+and an English (query translated first) or multilingual embedding mode.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Embedding backend settings (override with environment variables)
+#   torch:     fp32 PyTorch model (default)
+#   onnx:      fp32 ONNX export run by onnxruntime
+#   onnx-int8: dynamically quantized int8 ONNX export run by onnxruntime
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# ONNX file inside the model repo or directory; the all-MiniLM-L6-v2 hub repo ships
+# model_quint8_avx2.onnx, model_qint8_avx512.onnx, model_qint8_avx512_vnni.onnx and model_qint8_arm64.onnx
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Embedding mode (override with environment variables)
+#   translate:    Korean queries are translated to English and embedded with an English model (default)
+#   multilingual: Korean queries are embedded directly with a multilingual model, skipping translation
+EMBEDDING_MODE = os.getenv("EMBEDDING_MODE", "translate")
+MULTILINGUAL_MODEL_NAME = os.getenv("MULTILINGUAL_MODEL_NAME", "paraphrase-multilingual-MiniLM-L12-v2")
+
+EMBEDDING_MODELS = {
+    "translate": "all-MiniLM-L6-v2",
+    "multilingual": MULTILINGUAL_MODEL_NAME,
+}
+# Each mode has its own collection so vectors from different models are never mixed
+EMBEDDING_COLLECTIONS = {
+    "translate": "restaurants",
+    "multilingual": "restaurants_multilingual",
+}
+
+def check_embedding_mode(mode: str) -> str:
+    """Return mode if it is a known embedding mode, otherwise raise ValueError."""
+    if mode not in EMBEDDING_MODELS:
+        raise ValueError(f"Unknown embedding mode: {mode} (expected one of {tuple(EMBEDDING_MODELS)})")
+    return mode
+
+def embedding_model_id(model_name: str, backend: str = EMBEDDING_BACKEND) -> str:
+    """Identify the model, backend and ONNX file, which together determine the vectors produced."""
+    if backend == "onnx-int8":
+        return f"{model_name}|{backend}|{EMBEDDING_ONNX_INT8_FILE}"
+    return f"{model_name}|{backend}"
+
+def load_embedding_model(model_name: str = "all-MiniLM-L6-v2", backend: str = EMBEDDING_BACKEND):
+    """Load a SentenceTransformer for CPU inference with the requested backend."""
+    from sentence_transformers import SentenceTransformer
+
+    device = "cpu"  # Force CPU to avoid GPU issues
+    if backend == "torch":
+        model = SentenceTransformer(model_name, device=device)
+    elif backend == "onnx":
+        model = SentenceTransformer(model_name, device=device, backend="onnx")
+    elif backend == "onnx-int8":
+        model = SentenceTransformer(model_name, device=device, backend="onnx",
+                                    model_kwargs={"file_name": EMBEDDING_ONNX_INT8_FILE})
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {EMBEDDING_BACKENDS})")
+
+    logger.info(f"Loaded embedding model {model_name} with {backend} backend")
+    return model
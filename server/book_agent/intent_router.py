@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Compiled intent router for the agent's keyword flows.
+A declarative keyword table is compiled once, and each message is scanned a single time.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .keyword_matcher import KeywordMatcher
+
+# Keyword table: label -> keywords matched as case-insensitive substrings
+INTENT_KEYWORDS = {
+    # Intents
+    "greeting": [
+        "안녕", "안녕하세요", "안녕하십니까", "처음", "시작", "헬로",
+        "hello", "hi", "hey", "good morning", "good afternoon", "good evening",
+        "시작해", "시작할게", "도움말", "help",
+    ],
+    "search": ["추천해", "추천해줘", "알려줘", "찾아줘", "검색해", "추천받고싶어", "먹고싶어", "recommend", "find", "search"],
+    "reservation": ["예약", "예약해", "예약해줘", "booking", "reserve", "reservation"],
+
+    # Entities
+    "food": ["식당", "레스토랑", "맛집", "음식", "요리", "카페", "술집", "바", "restaurant", "food", "cafe", "bar"],
+    "cuisine": ["이탈리아", "중국", "한국", "일본", "태국", "피자", "커피", "치킨", "italian", "chinese", "korean", "japanese", "thai", "pizza", "coffee", "chicken"],
+    "restaurant_name": ["홍콩반점"],
+    "relative_date": ["모레"],
+}
+
+INTENT_MATCHER = KeywordMatcher(INTENT_KEYWORDS)
+
+@dataclass
+class IntentMatch:
+    """Intents and entities found in a user message."""
+    matches: Dict[str, List[str]] = field(default_factory=dict)
+
+    def has(self, label: str) -> bool:
+        """Return True if any keyword of label was found."""
+        return label in self.matches
+
+    def entities(self, label: str) -> List[str]:
+        """Return the keywords matched for label, e.g. the cuisines mentioned."""
+        return self.matches.get(label, [])
+
+def classify_intent(user_message: str) -> IntentMatch:
+    """Scan the message once and return every matched intent and entity."""
+    return IntentMatch(INTENT_MATCHER.match(user_message or ""))
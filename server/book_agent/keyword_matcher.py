@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compiled multi-keyword matcher.
+Finds every label whose keywords occur as substrings of a text in a single regex scan.
+"""
+
+import re
+from typing import Dict, Hashable, Iterable, List
+
+def _trie_pattern(node: dict) -> str:
+    """Build a regex that matches exactly the words stored in a character trie."""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        return '(?:' + pattern + ')?'
+    return pattern
+
+class KeywordMatcher:
+    """Match a declarative {label: keywords} table against text in one pass."""
+
+    def __init__(self, table: Dict[Hashable, Iterable[str]]):
+        """Compile the keyword table into one combined alternation."""
+        self.labels = list(table)
+
+        # Map each lowercased keyword to the labels that list it
+        keyword_labels = {}
+        for index, label in enumerate(self.labels):
+            for keyword in table[label]:
+                if not keyword:
+                    continue
+                keyword_labels.setdefault(keyword.lower(), set()).add(index)
+
+        # A keyword also implies the labels of every keyword it contains,
+        # e.g. '바베큐' contains '바', so overlapping matches are not lost
+        self.keyword_labels = {}
+        for keyword in keyword_labels:
+            implied = {}
+            for other, other_labels in keyword_labels.items():
+                if other in keyword:
+                    for index in other_labels:
+                        implied.setdefault(index, []).append(other)
+            self.keyword_labels[keyword] = implied
+
+        # The keywords are folded into a prefix trie so the cost per position does not grow
+        # with the number of keywords. Greedy optional suffixes report the longest match at
+        # each position, and the zero-width lookahead lets the scan try every start position
+        trie = {}
+        for keyword in self.keyword_labels:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.regex = re.compile(f'(?=({_trie_pattern(trie)}))')
+
+    def match(self, text: str) -> Dict[Hashable, List[str]]:
+        """Return {label: matched keywords} for every label found in text, in table order."""
+        found = {}
+        for keyword_match in self.regex.finditer(text.lower()):
+            for index, keywords in self.keyword_labels[keyword_match.group(1)].items():
+                matched = found.setdefault(index, [])
+                for keyword in keywords:
+                    if keyword not in matched:
+                        matched.append(keyword)
+        return {self.labels[index]: found[index] for index in sorted(found)}
+
+    def labels_in(self, text: str) -> List[Hashable]:
+        """Return the labels found in text, in table order."""
+        found = set()
+        for keyword_match in self.regex.finditer(text.lower()):
+            found.update(self.keyword_labels[keyword_match.group(1)])
+        return [self.labels[index] for index in sorted(found)]
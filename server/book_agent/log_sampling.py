@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Sampled logging for per-request messages on the hot path.
+Only a random fraction of the records is emitted, and nothing is formatted
+unless the level is enabled and the record is sampled.
+"""
+
+import logging
+import os
+import random
+
+# Fraction of per-request debug/info records that are logged (1 logs all of them)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+class SampledLogger:
+    """Wrap a logger so that debug and info records are emitted for a fraction of calls."""
+
+    def __init__(self, logger: logging.Logger, rate: float = LOG_SAMPLE_RATE):
+        self.logger = logger
+        self.rate = rate
+
+    def log(self, level: int, msg: str, *args, stacklevel: int = 2):
+        # stacklevel makes the record point at the caller rather than at this wrapper
+        if not self.logger.isEnabledFor(level):
+            return
+        if self.rate < 1.0 and random.random() >= self.rate:
+            return
+        self.logger.log(level, msg, *args, stacklevel=stacklevel)
+
+    def debug(self, msg: str, *args):
+        self.log(logging.DEBUG, msg, *args, stacklevel=3)
+
+    def info(self, msg: str, *args):
+        self.log(logging.INFO, msg, *args, stacklevel=3)
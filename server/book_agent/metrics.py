@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+In-process metrics: counters, gauges and histograms with labels,
+rendered in the Prometheus text exposition format.
+Values that already live in other objects (cache and pool counters) are read
+through callbacks at scrape time, so they cost nothing on the hot path.
+Stage timings of a single turn can also be traced, for the slow-query log.
+"""
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Serve /metrics from the agent process too (useful in proxy mode, where the ADK api_server
+# runs the agent); 0 disables it
+AGENT_METRICS_PORT = int(os.getenv("AGENT_METRICS_PORT", "0"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from sub-millisecond pattern lookups to multi-second model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    value = float(value)
+    # Counts render as integers; bucket bounds and sums keep their decimals
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class Metric:
+    """Base class: a named family of values, one per combination of label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 registry: Optional["MetricsRegistry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._functions: Dict[tuple, Callable[[], float]] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: tuple, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """Read the value for these labels from func whenever metrics are rendered."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = func
+            # The function replaces any value stored directly for these labels
+            getattr(self, "_values", {}).pop(key, None)
+
+    def _function_samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            functions = list(self._functions.items())
+        samples = []
+        for key, func in functions:
+            try:
+                samples.append(("", self._label_text(key), float(func())))
+            except Exception as e:
+                logger.warning(f"Cannot read metric {self.name}: {e}")
+        return samples
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Return (name suffix, label text, value) for every sample."""
+        return self._function_samples()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, label_text, value in self.samples():
+            lines.append(f"{self.name}{suffix}{label_text} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A metric without labels has a single value, reported from the start
+        self._values: Dict[tuple, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        return [("", self._label_text(key), value) for key, value in values] + self._function_samples()
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A metric without labels has a single value, reported from the start
+        self._values: Dict[tuple, float] = {} if self.labelnames else {(): 0.0}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        return [("", self._label_text(key), value) for key, value in values] + self._function_samples()
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS, registry: Optional["MetricsRegistry"] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", self._label_text(key, (("le", _format_bound(bound)),)), cumulative))
+            samples.append(("_sum", self._label_text(key), total))
+            samples.append(("_count", self._label_text(key), cumulative))
+        return samples
+
+class StageTrace:
+    """Stage timings and details of one turn, collected while it runs.
+    Stages and details also count towards the enclosing trace, e.g. a search inside a chat turn."""
+
+    def __init__(self, parent: Optional["StageTrace"] = None):
+        self.parent = parent
+        self.stages: Dict[str, float] = {}
+        self.details: Dict[str, Any] = {}
+
+    def add_stage(self, stage: str, seconds: float):
+        trace = self
+        while trace is not None:
+            trace.stages[stage] = trace.stages.get(stage, 0.0) + seconds
+            trace = trace.parent
+
+    def annotate(self, **details):
+        trace = self
+        while trace is not None:
+            trace.details.update(details)
+            trace = trace.parent
+
+    def stages_ms(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+
+_current_trace: ContextVar[Optional[StageTrace]] = ContextVar("stage_trace", default=None)
+
+def current_trace() -> Optional[StageTrace]:
+    return _current_trace.get()
+
+@contextmanager
+def trace_stages() -> Iterator[StageTrace]:
+    """Trace the stages observed in this context, including calls it runs on the worker pool."""
+    trace = StageTrace(_current_trace.get())
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+class StageHistogram(Histogram):
+    """Histogram with a "stage" label whose observations are also added to the active trace."""
+
+    def observe(self, value: float, **labels):
+        super().observe(value, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_stage(labels["stage"], value)
+
+class MetricsRegistry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global registry, shared by the agent modules and server.py
+REGISTRY = MetricsRegistry()
+
+# Agent metrics shared across modules
+STAGE_SECONDS = StageHistogram(
+    "book_agent_stage_seconds",
+    "Time spent in each stage of an agent turn",
+    ["stage"],
+)
+TRANSLATIONS = Counter(
+    "book_agent_translations_total",
+    "Korean queries translated, by how the translation was produced (cache, model or pattern)",
+    ["method"],
+)
+CACHE_HITS = Counter("book_agent_cache_hits_total", "Cache lookups that found an entry", ["cache"])
+CACHE_MISSES = Counter("book_agent_cache_misses_total", "Cache lookups that found nothing", ["cache"])
+CACHE_HIT_RATIO = Gauge("book_agent_cache_hit_ratio", "Hits over lookups since start", ["cache"])
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+def track_cache(cache: str, counts: Callable[[], Optional[Tuple[int, int]]]):
+    """Expose the hits and misses of a cache, read from counts() when metrics are rendered.
+    counts returns (hits, misses), or None while the cache does not exist yet."""
+    def hits() -> float:
+        value = counts()
+        return value[0] if value else 0
+
+    def misses() -> float:
+        value = counts()
+        return value[1] if value else 0
+
+    def ratio() -> float:
+        value = counts()
+        lookups = value[0] + value[1] if value else 0
+        return value[0] / lookups if lookups else 0.0
+
+    CACHE_HITS.set_function(hits, cache=cache)
+    CACHE_MISSES.set_function(misses, cache=cache)
+    CACHE_HIT_RATIO.set_function(ratio, cache=cache)
+
+def timed_iter(items: Iterable, histogram: Histogram, **labels) -> Iterator:
+    """Yield from items and observe the total time spent producing them, not the time spent by the consumer."""
+    iterator = iter(items)
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        histogram.observe(elapsed, **labels)
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+def start_metrics_server(port: int = AGENT_METRICS_PORT, host: str = "0.0.0.0"):
+    """Serve the registry at http://host:port/metrics from a background thread, once per process."""
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is not None or not port:
+            return
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_metrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Cannot serve agent metrics on port {port}: {e}")
+            return
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Serving agent metrics on port {port}")
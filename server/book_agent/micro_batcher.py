@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching for model calls.
+Concurrent callers are grouped into a single call of a batch function.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+from .profiler import run_profiled
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Collect concurrent items for up to max_wait_ms or max_batch_size items and process them together."""
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0,
+                 name: str = "micro-batcher"):
+        """Initialize the batcher. batch_fn maps a list of items to a list of results in the same order."""
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Number of callers currently waiting for a result
+        self._pending = 0
+
+        # Counters
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+
+    def submit(self, item: Any) -> Any:
+        """Return the result for a single item, batched with concurrent callers."""
+        if self.max_batch_size == 1:
+            return self._process([item])[0]
+
+        self._ensure_worker()
+        future = Future()
+        with self._stats_lock:
+            self._pending += 1
+        try:
+            self._queue.put((item, future))
+            return future.result()
+        finally:
+            with self._stats_lock:
+                self._pending -= 1
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        """Batching loop running on a dedicated thread."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            # Keep collecting until the batch is full, the wait expires or every pending caller is in
+            while len(batch) < self.max_batch_size and len(batch) < self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self._process(items)
+            except Exception as e:
+                logger.error(f"{self.name}: batch of {len(items)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _process(self, items: List[Any]) -> List[Any]:
+        results = run_profiled(self.batch_fn, items)
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(items)
+            self.max_observed_batch = max(self.max_observed_batch, len(items))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the batching counters."""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "max_observed_batch": self.max_observed_batch,
+            }
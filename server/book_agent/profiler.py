@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+On-demand profiling of a live process.
+Sampling mode snapshots the stacks of every Python thread at a fixed interval and
+returns them as collapsed stacks (flame graph input). Deterministic mode runs cProfile
+around each agent call on the worker pool and each model batch, in whichever thread it
+runs, and returns pstats text.
+Either mode also reports CPU time per OS thread over the session, which covers
+torch's native intra-op threads, and torch's thread settings.
+While no session is active the only cost is one global check per agent call and model batch.
+"""
+
+import collections
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Any, Callable, Counter, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Profiling session settings (override with environment variables)
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+PROFILE_MODES = ("sampling", "deterministic")
+
+class SamplingProfiler:
+    """Background thread that counts the stacks of all other Python threads."""
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.interval = max(interval_ms, 0.5) / 1000.0
+        self.stacks: Counter[str] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Render the stacks as "root;...;leaf count" lines, most frequent first."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+# Python 3.12+ profiles through sys.monitoring: one profiler per interpreter, covering every
+# thread. Earlier versions profile only the thread that enabled the profiler.
+PROFILER_COVERS_ALL_THREADS = sys.version_info >= (3, 12)
+
+class CallProfiler:
+    """
+    cProfile around agent calls and model batches, merged into one set of stats.
+    Before Python 3.12 each thread gets its own profile, enabled while the thread runs a
+    profiled call, so a model batch is profiled in the batcher thread while the agent call
+    that submitted it waits. On 3.12+ one profile covering all threads runs for the session.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.skipped_calls = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: List[cProfile.Profile] = []
+        self._shared: Optional[cProfile.Profile] = None
+
+    def start(self):
+        if not PROFILER_COVERS_ALL_THREADS:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception as e:
+            # Another profiler (e.g. a debugger or coverage tool) is already active
+            logger.warning(f"Could not enable cProfile: {e}")
+            return
+        self._shared = profile
+        self._profiles.append(profile)
+
+    def stop(self):
+        if self._shared is not None:
+            self._shared.disable()
+
+    def run(self, func: Callable[..., Any], *args) -> Any:
+        if PROFILER_COVERS_ALL_THREADS:
+            self._count(self._shared is not None)
+            return func(*args)
+        # A call nested in a profiled call on the same thread is covered by it
+        if getattr(self._local, "active", False):
+            return func(*args)
+
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        try:
+            profile.enable()
+        except Exception as e:
+            logger.debug(f"Could not enable cProfile: {e}")
+            self._count(False)
+            return func(*args)
+        self._local.active = True
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            self._local.active = False
+            self._count(True)
+
+    def _count(self, profiled: bool):
+        with self._lock:
+            if profiled:
+                self.calls += 1
+            else:
+                self.skipped_calls += 1
+
+    def render(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """Merge the profiles of all threads and render them as pstats text."""
+        stats = None
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            # Profiling must never fail the session; a thread that recorded nothing has no stats
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except Exception as e:
+                logger.debug(f"Could not merge profile stats: {e}")
+        if stats is None:
+            return "No calls were profiled\n"
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+# Deterministic profiler of the active session; None while not profiling
+_call_profiler: Optional[CallProfiler] = None
+
+def run_profiled(func: Callable[..., Any], *args) -> Any:
+    """Call func, under cProfile when a deterministic profiling session is active."""
+    profiler = _call_profiler
+    if profiler is None:
+        return func(*args)
+    return profiler.run(func, *args)
+
+def thread_cpu_seconds() -> Dict[int, Dict[str, Any]]:
+    """CPU seconds used so far by each OS thread of this process, from /proc (Linux only)."""
+    ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    threads = {}
+    try:
+        task_ids = os.listdir("/proc/self/task")
+    except OSError:
+        return threads
+    for task_id in task_ids:
+        try:
+            with open(f"/proc/self/task/{task_id}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is in parentheses and may contain spaces
+        name = stat[stat.index("(") + 1:stat.rindex(")")]
+        fields = stat[stat.rindex(")") + 2:].split()
+        threads[int(task_id)] = {"name": name, "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks}
+    return threads
+
+def torch_thread_info() -> Dict[str, Any]:
+    """Thread settings of torch and the OpenMP/MKL runtimes, without importing torch."""
+    torch = sys.modules.get("torch")
+    info: Dict[str, Any] = {
+        "cpu_count": os.cpu_count(),
+        "usable_cpus": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        "OMP_NUM_THREADS": os.getenv("OMP_NUM_THREADS"),
+        "MKL_NUM_THREADS": os.getenv("MKL_NUM_THREADS"),
+        "torch_loaded": torch is not None,
+    }
+    if torch is not None:
+        info["intra_op_threads"] = torch.get_num_threads()
+        info["inter_op_threads"] = torch.get_num_interop_threads()
+    return info
+
+class ProfileSession:
+    """One profiling window, ended after a number of seconds or of completed requests."""
+
+    def __init__(self, mode: str = "sampling", seconds: Optional[float] = None,
+                 requests: Optional[int] = None, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS,
+                 sort: str = "cumulative", limit: int = 50):
+        """Validate the settings. sort and limit apply to the pstats output of deterministic mode."""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            raise ValueError(f"Unknown pstats sort key: {sort}")
+        self.mode = mode
+        self.sort = sort
+        self.limit = limit
+        self.requests = requests
+        # A request-bounded session still stops at PROFILE_MAX_SECONDS
+        self.seconds = min(seconds or PROFILE_MAX_SECONDS, PROFILE_MAX_SECONDS)
+        self.interval_ms = interval_ms
+        self.completed_requests = 0
+        self.done = threading.Event()
+        self.sampler: Optional[SamplingProfiler] = None
+        self.call_profiler: Optional[CallProfiler] = None
+
+    def start(self):
+        global _call_profiler
+        self._threads_before = thread_cpu_seconds()
+        self._cpu_before = time.process_time()
+        self.started = time.perf_counter()
+        if self.mode == "sampling":
+            self.sampler = SamplingProfiler(self.interval_ms)
+            self.sampler.start()
+        else:
+            self.call_profiler = CallProfiler()
+            self.call_profiler.start()
+            _call_profiler = self.call_profiler
+
+    def request_done(self):
+        """Count a completed request; ends the session once enough have completed."""
+        self.completed_requests += 1
+        if self.requests and self.completed_requests >= self.requests:
+            self.done.set()
+
+    def wait(self):
+        """Block until the session's seconds have passed or its requests have completed."""
+        self.done.wait(self.seconds)
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling and return the profile with CPU usage per thread."""
+        global _call_profiler
+        elapsed = time.perf_counter() - self.started
+        if self.sampler is not None:
+            self.sampler.stop()
+            profile = self.sampler.collapsed()
+            profile_format = "collapsed"
+        else:
+            _call_profiler = None
+            self.call_profiler.stop()
+            profile = self.call_profiler.render(self.sort, self.limit)
+            profile_format = "pstats"
+        cpu_seconds = time.process_time() - self._cpu_before
+
+        # Native threads (torch intra-op and OpenMP workers) have no Python name
+        python_names = {thread.native_id: thread.name for thread in threading.enumerate()}
+        threads: List[Dict[str, Any]] = []
+        for thread_id, after in thread_cpu_seconds().items():
+            used = after["cpu_seconds"] - self._threads_before.get(thread_id, {}).get("cpu_seconds", 0.0)
+            if used > 0:
+                threads.append({"tid": thread_id, "name": python_names.get(thread_id, after["name"]),
+                                "python": thread_id in python_names, "cpu_seconds": round(used, 3)})
+        threads.sort(key=lambda thread: thread["cpu_seconds"], reverse=True)
+
+        return {
+            "mode": self.mode,
+            "format": profile_format,
+            "duration_s": round(elapsed, 3),
+            "requests": self.completed_requests,
+            "samples": self.sampler.samples if self.sampler is not None else None,
+            "profiled_calls": self.call_profiler.calls if self.call_profiler is not None else None,
+            "skipped_calls": self.call_profiler.skipped_calls if self.call_profiler is not None else None,
+            "process_cpu_seconds": round(cpu_seconds, 3),
+            # Average number of cores busy over the session
+            "cores_used": round(cpu_seconds / elapsed, 2) if elapsed > 0 else 0.0,
+            "torch": torch_thread_info(),
+            "threads": threads,
+            "profile": profile,
+        }
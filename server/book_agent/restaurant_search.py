@@ -5,12 +5,25 @@ Enhanced restaurant search and recommendation service using Qdrant vector databa
 
 import json
 import logging
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator, List, Dict, Any, Optional
+from dataclasses import dataclass, asdict, astuple
 import re
 from .translation_service import translate_korean_query
+from .embedding_batcher import EmbeddingBatcher, EMBEDDING_MAX_BATCH_SIZE, EMBEDDING_MAX_WAIT_MS
+from .embedding_model import (load_embedding_model, check_embedding_mode, EMBEDDING_BACKEND,
+                              EMBEDDING_MODE, EMBEDDING_MODELS, EMBEDDING_COLLECTIONS)
+from .result_cache import ResultCache
+from .metrics import STAGE_SECONDS, current_trace, trace_stages, track_cache
+from .slow_query_log import get_slow_query_log
+from .vector_backend import QdrantBackend, NumpyBackend, build_qdrant_filter, NUMPY_EMBEDDINGS_FILE
+
+# Heavy dependencies (qdrant_client, sentence_transformers, torch) are imported on first use
+# so that importing the agent stays fast
+if TYPE_CHECKING:
+    from qdrant_client import models
 
 # 포괄적 한국어-영어 번역 딕셔너리
 KOREAN_FOOD_TRANSLATION = {
@@ -73,6 +86,22 @@ KOREAN_FOOD_TRANSLATION = {
 
 logger = logging.getLogger(__name__)
 
+# Search result cache settings (override with environment variables)
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL_S = float(os.getenv("SEARCH_CACHE_TTL_S", "300"))
+# How often the collection is checked for re-indexing
+SEARCH_CACHE_CHECK_INTERVAL_S = float(os.getenv("SEARCH_CACHE_CHECK_INTERVAL_S", "30"))
+
+# Vector backend: "qdrant", "numpy", or "auto" (Qdrant, falling back to the NumPy index
+# when the server or collection is unavailable)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "auto")
+# Each embedding mode has its own default NumPy index directory
+NUMPY_INDEX_DIRS = {
+    mode: os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "yelp", index_name)
+    for mode, index_name in (("translate", "numpy_index"), ("multilingual", "numpy_index_multilingual"))
+}
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR")
+
 @dataclass
 class SearchFilters:
     """Search filters for restaurant recommendations."""
@@ -83,6 +112,15 @@ class SearchFilters:
     dogs_allowed: Optional[bool] = None
     price_range: Optional[str] = None  # "low", "medium", "high"
 
+    def cache_key(self) -> tuple:
+        """Return a hashable key identifying these filters."""
+        return tuple(tuple(value) if isinstance(value, list) else value
+                     for value in astuple(self))
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups."""
+    return ' '.join(query.lower().split())
+
 # Legacy translation function - now handled by translation_service.py
 # Keeping KOREAN_FOOD_TRANSLATION as backup for pattern matching
 
@@ -92,66 +130,189 @@ class RestaurantSearchService:
     def __init__(self,
                  qdrant_host: str = "localhost",
                  qdrant_port: int = 6333,
-                 model_name: str = "all-MiniLM-L6-v2"):
+                 model_name: Optional[str] = None,
+                 embedding_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+                 embedding_max_wait_ms: float = EMBEDDING_MAX_WAIT_MS,
+                 cache_size: int = SEARCH_CACHE_SIZE,
+                 cache_ttl_s: float = SEARCH_CACHE_TTL_S,
+                 vector_backend: str = VECTOR_BACKEND,
+                 numpy_index_dir: Optional[str] = NUMPY_INDEX_DIR,
+                 embedding_backend: str = EMBEDDING_BACKEND,
+                 embedding_mode: str = EMBEDDING_MODE):
         """Initialize the search service."""
+        # In multilingual mode queries are embedded as-is and the translation model is never loaded
+        self.embedding_mode = check_embedding_mode(embedding_mode)
+        self.translate_queries = embedding_mode == "translate"
+        self.collection_name = EMBEDDING_COLLECTIONS[embedding_mode]
+        model_name = model_name or EMBEDDING_MODELS[embedding_mode]
+        numpy_index_dir = numpy_index_dir or NUMPY_INDEX_DIRS[embedding_mode]
 
         # Connect to Qdrant
-        try:
-            self.client = QdrantClient(host=qdrant_host, port=qdrant_port)
-            logger.info(f"Connected to Qdrant at {qdrant_host}:{qdrant_port}")
-        except Exception as e:
-            logger.warning(f"Cannot connect to Qdrant server: {e}")
-            self.client = QdrantClient(":memory:")
-
-        # Initialize embedding model
-        import torch
-        device = "cpu"  # Force CPU to avoid GPU issues
-        self.model = SentenceTransformer(model_name, device=device)
-        self.collection_name = "restaurants"
+        self.client = None
+        if vector_backend != "numpy":
+            from qdrant_client import QdrantClient
+            try:
+                self.client = QdrantClient(host=qdrant_host, port=qdrant_port)
+                logger.info(f"Connected to Qdrant at {qdrant_host}:{qdrant_port}")
+            except Exception as e:
+                logger.warning(f"Cannot connect to Qdrant server: {e}")
+
+        self.backend = self._create_backend(vector_backend, numpy_index_dir)
+        logger.info(f"Using {self.backend.name} vector backend in {embedding_mode} embedding mode")
+
+        # Initialize embedding model (fp32 PyTorch or quantized ONNX, see embedding_model.py)
+        self.model = load_embedding_model(model_name, backend=embedding_backend)
+
+        # Group concurrent query embeddings into single encode calls
+        self.embedder = EmbeddingBatcher(self.model,
+                                         max_batch_size=embedding_batch_size,
+                                         max_wait_ms=embedding_max_wait_ms)
+
+        # Cache of formatted results keyed on the translated query, filters and limit
+        self.cache = ResultCache(max_size=cache_size, ttl_seconds=cache_ttl_s)
+        self._collection_fingerprint = None
+        self._next_collection_check = 0.0
+
+    def _create_backend(self, vector_backend: str, numpy_index_dir: str):
+        """
+        Pick the vector backend, falling back to the NumPy index in auto mode.
+        The choice is made once, at startup; a later Qdrant outage makes searches fail.
+        """
+        if vector_backend == "numpy":
+            return NumpyBackend(numpy_index_dir)
+        if vector_backend not in ("qdrant", "auto"):
+            raise ValueError(f"Unknown vector backend: {vector_backend}")
+
+        qdrant = QdrantBackend(self.client, self.collection_name) if self.client is not None else None
+        if vector_backend == "qdrant":
+            if qdrant is None:
+                raise RuntimeError("Vector backend 'qdrant' requested but no Qdrant client could be created; "
+                                   "check the Qdrant host and port, or use the 'auto' or 'numpy' backend")
+            return qdrant
+
+        if qdrant is not None and qdrant.is_ready():
+            return qdrant
+        if os.path.exists(os.path.join(numpy_index_dir, NUMPY_EMBEDDINGS_FILE)):
+            try:
+                return NumpyBackend(numpy_index_dir)
+            except Exception as e:
+                logger.warning(f"Cannot load NumPy index from {numpy_index_dir}: {e}")
+        if qdrant is None:
+            raise RuntimeError("No vector backend available: Qdrant is unreachable and there is no NumPy index")
+        logger.warning(f"No NumPy index at {numpy_index_dir}, staying on Qdrant")
+        return qdrant
 
     def search_restaurants(self,
                           query: str,
                           filters: Optional[SearchFilters] = None,
                           limit: int = 5) -> List[Dict[str, Any]]:
         """Search restaurants using semantic similarity and filters."""
-
+        slow_query_log = get_slow_query_log()
+        if not slow_query_log.enabled:
+            return self._search_restaurants(query, filters, limit)
+
+        # Trace the stages so a slow search is logged with its timings
+        start = time.perf_counter()
+        with trace_stages() as trace:
+            results = self._search_restaurants(query, filters, limit)
+        slow_query_log.record(
+            "search", (time.perf_counter() - start) * 1000,
+            query=query,
+            translated_query=trace.details.get("translated_query"),
+            filters=asdict(filters) if filters else None,
+            limit=limit,
+            result_ids=[restaurant.get('restaurant_id') for restaurant in results],
+            stages_ms=trace.stages_ms(),
+            backend=self.backend.name,
+            embedding_mode=self.embedding_mode,
+        )
+        return results
+
+    def _search_restaurants(self,
+                            query: str,
+                            filters: Optional[SearchFilters],
+                            limit: int) -> List[Dict[str, Any]]:
         try:
-            # 한국어 쿼리 번역으로 검색 품질 향상
-            enhanced_query = translate_korean_query(query)
-
-            # Generate query embedding
-            query_embedding = self.model.encode([enhanced_query], convert_to_numpy=True)[0]
-
-            # Search in Qdrant using correct API
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding.tolist(),
-                limit=limit * 2,  # Get more results for filtering
-            )
-
-            # Apply filters manually if needed
-            filtered_results = search_results
-            if filters:
-                filtered_results = self._apply_manual_filters(search_results, filters)
-
-            # Format and return results
-            results = []
-            for result in filtered_results[:limit]:
-                restaurant_data = result.payload.copy()
-                restaurant_data['similarity_score'] = result.score
-                results.append(restaurant_data)
-
-            return results
+            # 한국어 쿼리 번역으로 검색 품질 향상 (multilingual 모드에서는 번역 생략)
+            enhanced_query = translate_korean_query(query) if self.translate_queries else query
+            trace = current_trace()
+            if trace is not None:
+                trace.annotate(translated_query=enhanced_query,
+                               filters=asdict(filters) if filters else None)
+
+            self._check_collection_changed()
+            cache_key = (normalize_query(enhanced_query),
+                         filters.cache_key() if filters else None,
+                         limit)
+            results = self.cache.get_or_compute(
+                cache_key, lambda: self._search(enhanced_query, filters, limit))
+
+            # Hand out copies so callers cannot mutate cached entries
+            return [restaurant.copy() for restaurant in results]
 
         except Exception as e:
-            logger.error(f"Error searching restaurants: {e}")
+            logger.error(f"Error searching restaurants for query '{query}': {e}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
-            print(f"Search error: {e}")  # Also print to console
-            print(f"Query was: {query}")
             return []
 
-    def _apply_manual_filters(self, results, filters: SearchFilters):
+    def _search(self,
+                enhanced_query: str,
+                filters: Optional[SearchFilters],
+                limit: int) -> List[Dict[str, Any]]:
+        """Embed the (translated) query and run the vector search."""
+        # Generate query embedding
+        with STAGE_SECONDS.time(stage="embedding"):
+            query_embedding = self.embedder.encode(enhanced_query)
+
+        # Search with the filters pushed down into the backend,
+        # so selective filters still fill the limit without overfetching
+        with STAGE_SECONDS.time(stage="vector_search"):
+            search_results = self.backend.search(query_embedding, filters, limit)
+
+        # Format and return results
+        results = []
+        for result in search_results[:limit]:
+            restaurant_data = result.payload.copy()
+            restaurant_data['similarity_score'] = result.score
+            results.append(restaurant_data)
+
+        return results
+
+    def _check_collection_changed(self):
+        """Clear the result cache when the collection was re-indexed."""
+        if not self.cache.enabled:
+            return
+        now = time.monotonic()
+        if now < self._next_collection_check:
+            return
+        self._next_collection_check = now + SEARCH_CACHE_CHECK_INTERVAL_S
+
+        try:
+            fingerprint = self.backend.fingerprint()
+        except Exception as e:
+            logger.warning(f"Cannot read collection info: {e}")
+            return
+
+        if self._collection_fingerprint is not None and fingerprint != self._collection_fingerprint:
+            logger.info("Collection changed, clearing search cache")
+            if isinstance(self.backend, NumpyBackend):
+                # The loaded matrix and payloads are the old index; load the new files
+                try:
+                    self.backend = NumpyBackend(self.backend.index_dir)
+                except Exception as e:
+                    logger.warning(f"Cannot reload NumPy index from {self.backend.index_dir}: {e}")
+                    return
+            self.cache.clear()
+        self._collection_fingerprint = fingerprint
+
+    def invalidate_cache(self):
+        """Drop all cached search results, e.g. after re-indexing the collection."""
+        self.cache.clear()
+        self._collection_fingerprint = None
+
+    @staticmethod
+    def _apply_manual_filters(results, filters: SearchFilters):
         """Apply filters manually to search results."""
         filtered = []
         for result in results:
@@ -182,51 +343,10 @@ class RestaurantSearchService:
 
         return filtered
 
-    def _build_qdrant_filter(self, filters: SearchFilters) -> Dict:
-        """Build Qdrant filter from SearchFilters."""
-        conditions = []
-
-        if filters.location:
-            conditions.append({
-                "key": "city",
-                "match": {"value": filters.location}
-            })
-
-        if filters.min_stars:
-            conditions.append({
-                "key": "stars",
-                "range": {"gte": filters.min_stars}
-            })
-
-        if filters.good_for_kids is not None:
-            conditions.append({
-                "key": "good_for_kids",
-                "match": {"value": filters.good_for_kids}
-            })
-
-        if filters.dogs_allowed is not None:
-            conditions.append({
-                "key": "dogs_allowed",
-                "match": {"value": filters.dogs_allowed}
-            })
-
-        if filters.categories:
-            # Match any of the specified categories
-            category_conditions = []
-            for category in filters.categories:
-                category_conditions.append({
-                    "key": "categories",
-                    "match": {"any": [category]}
-                })
-            if category_conditions:
-                conditions.append({
-                    "should": category_conditions
-                })
-
-        if not conditions:
-            return None
-
-        return {"must": conditions} if len(conditions) > 1 else conditions[0]
+    @staticmethod
+    def _build_qdrant_filter(filters: Optional[SearchFilters]) -> Optional["models.Filter"]:
+        """Build a native Qdrant filter from SearchFilters."""
+        return build_qdrant_filter(filters)
 
     def get_recommendations_by_preferences(self,
                                          preferences: str,
@@ -281,14 +401,29 @@ class RestaurantSearchService:
 
 # Global service instance
 _search_service = None
+_search_service_lock = threading.Lock()
+
+def _search_cache_counts():
+    if _search_service is None:
+        return None
+    return _search_service.cache.hits, _search_service.cache.misses
+
+track_cache("search", _search_cache_counts)
 
 def get_search_service() -> RestaurantSearchService:
     """Get or create the global search service instance."""
     global _search_service
     if _search_service is None:
-        _search_service = RestaurantSearchService()
+        with _search_service_lock:
+            if _search_service is None:
+                _search_service = RestaurantSearchService()
     return _search_service
 
+def invalidate_search_cache():
+    """Drop cached search results of the global service, if it was created."""
+    if _search_service is not None:
+        _search_service.invalidate_cache()
+
 def search_restaurants_by_query(query: str, limit: int = 3) -> List[Dict[str, Any]]:
     """Simple function to search restaurants by query."""
     service = get_search_service()
@@ -296,16 +431,19 @@ def search_restaurants_by_query(query: str, limit: int = 3) -> List[Dict[str, An
 
 def format_restaurant_response(restaurants: List[Dict[str, Any]]) -> List[Dict[str, str]]:
     """Format restaurant results for the agent response."""
-    if not restaurants:
-        return [{"type": "Message", "text": "죄송합니다. 조건에 맞는 레스토랑을 찾을 수 없습니다."}]
+    return list(iter_restaurant_response(restaurants))
 
-    response = []
+def iter_restaurant_response(restaurants: List[Dict[str, Any]]) -> Iterator[Dict[str, str]]:
+    """Yield the agent response items one at a time, the introduction message first."""
+    if not restaurants:
+        yield {"type": "Message", "text": "죄송합니다. 조건에 맞는 레스토랑을 찾을 수 없습니다."}
+        return
 
     # Add introduction message
-    response.append({
+    yield {
         "type": "Message",
         "text": f"추천 레스토랑 {len(restaurants)}곳을 찾았습니다:"
-    })
+    }
 
     # Add restaurant options
     for restaurant in restaurants:
@@ -319,11 +457,9 @@ def format_restaurant_response(restaurants: List[Dict[str, Any]]) -> List[Dict[s
         if address and city:
             description += f" · {address}, {city}"
 
-        response.append({
+        yield {
             "type": "Restaurant Option",
             "title": restaurant.get('name', ''),
             "id": restaurant.get('restaurant_id', ''),
             "description": description
-        })
-
-    return response
\ No newline at end of file
+        }
\ No newline at end of file
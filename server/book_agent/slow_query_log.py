@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Slow-query log: searches and chat turns slower than a threshold are appended to a
+rotating JSONL file with their query, translated query, filters, result ids and
+per-stage timings, so tail-latency incidents can be replayed offline
+(see scripts/replay_slow_queries.py).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Slow-query log settings (override with environment variables)
+# An empty SLOW_QUERY_LOG_PATH disables the log
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+class SlowQueryLog:
+    """Append records of slow operations to a size-rotated JSONL file."""
+
+    def __init__(self,
+                 path: Optional[str] = SLOW_QUERY_LOG_PATH,
+                 threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 max_bytes: int = SLOW_QUERY_LOG_MAX_BYTES,
+                 backup_count: int = SLOW_QUERY_LOG_BACKUPS):
+        """Initialize the log. A path of None or "" disables it."""
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.recorded = 0
+        self._handler = None
+        if path:
+            # The handler serializes writes across threads and rotates to path.1, path.2, ...
+            self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding="utf-8", delay=True)
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.info(f"Slow-query log at {path} (threshold {threshold_ms:.0f} ms)")
+
+    @property
+    def enabled(self) -> bool:
+        return self._handler is not None
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return self.enabled and elapsed_ms >= self.threshold_ms
+
+    def record(self, source: str, elapsed_ms: float, **fields: Any) -> bool:
+        """Append a record if elapsed_ms reaches the threshold. Returns whether it was written."""
+        if not self.is_slow(elapsed_ms):
+            return False
+        entry: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "source": source,
+            "total_ms": round(elapsed_ms, 3),
+        }
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        # handle() takes the handler lock, so concurrent records do not interleave
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+        self.recorded += 1
+        return True
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+
+# Global slow-query log instance
+_slow_query_log = None
+_slow_query_log_lock = threading.Lock()
+
+def get_slow_query_log() -> SlowQueryLog:
+    """Get or create the global slow-query log."""
+    global _slow_query_log
+    if _slow_query_log is None:
+        with _slow_query_log_lock:
+            if _slow_query_log is None:
+                _slow_query_log = SlowQueryLog()
+    return _slow_query_log
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for Korean to English translations.
+An in-memory LRU sits in front of an on-disk SQLite store so translations survive restarts.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from .result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Normalize Korean text for cache lookups."""
+    return ' '.join(text.lower().split())
+
+class TranslationCache:
+    """Two-level translation cache: memory LRU backed by SQLite."""
+
+    def __init__(self, path: Optional[str], model_name: str, memory_size: int = 4096):
+        """Initialize the cache. A path of None or "" keeps translations in memory only."""
+        self.model_name = model_name
+        self.memory = ResultCache(max_size=memory_size, ttl_seconds=0)
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        # Counters for the disk level
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " model TEXT NOT NULL,"
+                    " source TEXT NOT NULL,"
+                    " translation TEXT NOT NULL,"
+                    " PRIMARY KEY (model, source))"
+                )
+                self._db.commit()
+                logger.info(f"Translation cache at {path}")
+            except sqlite3.Error as e:
+                logger.warning(f"Cannot open translation cache {path}: {e}")
+                self._db = None
+
+    def get(self, text: str) -> Optional[str]:
+        """Return the cached translation for text, or None."""
+        key = normalize_text(text)
+        translation = self.memory.get(key)
+        if translation is not None or self._db is None:
+            return translation
+
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "SELECT translation FROM translations WHERE model = ? AND source = ?",
+                    (self.model_name, key),
+                ).fetchone()
+            except sqlite3.Error as e:
+                # A locked or corrupt store must not fail the translation; treat it as a miss
+                logger.warning(f"Cannot read translation cache: {e}")
+                row = None
+            if row is None:
+                self.disk_misses += 1
+                return None
+            self.disk_hits += 1
+
+        self.memory.put(key, row[0])
+        return row[0]
+
+    def put(self, text: str, translation: str):
+        """Store a translation in memory and on disk."""
+        self.put_many([(text, translation)])
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """Store several translations with a single disk commit."""
+        rows = []
+        for text, translation in items:
+            key = normalize_text(text)
+            self.memory.put(key, translation)
+            rows.append((self.model_name, key, translation))
+
+        if self._db is None or not rows:
+            return
+        with self._db_lock:
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO translations (model, source, translation) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Cannot write translation cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the cache counters."""
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_misses"] = self.disk_misses
+        stats["persistent"] = self._db is not None
+        return stats
+
+    def close(self):
+        """Close the on-disk store."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
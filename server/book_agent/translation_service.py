@@ -5,23 +5,138 @@ Provides translation functionality without external API dependencies.
 """
 
 import logging
-from typing import Optional
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
 import re
 
+from .keyword_matcher import KeywordMatcher
+from .log_sampling import SampledLogger
+from .metrics import STAGE_SECONDS, TRANSLATIONS, track_cache
+from .micro_batcher import MicroBatcher
+from .translation_cache import TranslationCache
+
 logger = logging.getLogger(__name__)
+# Per-query translation lines are debug records, and only a sample of them is logged
+sampled_logger = SampledLogger(logger)
+
+KOREAN_PATTERN = re.compile(r'[가-힣]')
+
+TRANSLATION_MODEL_NAME = "Helsinki-NLP/opus-mt-ko-en"
+
+# Translation cache settings (override with environment variables)
+# An empty TRANSLATION_CACHE_PATH keeps the cache in memory only
+TRANSLATION_CACHE_PATH = os.getenv(
+    "TRANSLATION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "translation_cache.sqlite3"),
+)
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+
+# Model settings: "fp32" or "int8" (dynamic int8 quantization of the Linear layers)
+TRANSLATION_LOAD_MODE = os.getenv("TRANSLATION_LOAD_MODE", "fp32")
+TRANSLATION_MAX_LENGTH = int(os.getenv("TRANSLATION_MAX_LENGTH", "128"))
+
+# Micro-batching of concurrent queries into one generate call
+TRANSLATION_MAX_BATCH_SIZE = int(os.getenv("TRANSLATION_MAX_BATCH_SIZE", "8"))
+TRANSLATION_MAX_WAIT_MS = float(os.getenv("TRANSLATION_MAX_WAIT_MS", "10.0"))
+
+# Enhanced Korean food translation patterns used by the pattern-based fallback
+KOREAN_FOOD_PATTERNS = {
+    # 국가/지역 음식
+    r'중국|중식|짜장|짬뽕|탕수육|마파두부|궁보|딤섬|중식집|중국집|중국관': 'chinese food restaurant',
+    r'일본|일식|스시|사시미|라멘|우동|소바|돈까스|규동|사케|일식집|일본집': 'japanese sushi ramen restaurant',
+    r'이탈리아|양식|파스타|피자|리조또|스파게티|이탈리아식|양식집': 'italian pasta pizza restaurant',
+    r'태국|태식|팟타이|똠양꿍|그린커리|팬센|태국식': 'thai food restaurant',
+    r'인도|인도식|커리|난|탄두리|바스마티': 'indian curry restaurant',
+    r'베트남|월남|쌀국수|분짜|반미': 'vietnamese pho restaurant',
+    r'멕시코|멕시칸|타코|부리또|케사디야|나초': 'mexican taco burrito restaurant',
+    r'한국|한식|김치|불고기|갈비|비빔밥|냉면|삼겹살|한식집': 'korean bbq restaurant',
+    r'프랑스|프렌치|에스카르고|크로아상': 'french restaurant',
+    r'스페인|스패니시|파에야|타파스': 'spanish restaurant',
+
+    # 음식 유형
+    r'피자|피자집': 'pizza restaurant',
+    r'햄버거|버거|버거집': 'burger hamburger restaurant',
+    r'치킨|닭|프라이드|치킨집': 'chicken fried restaurant',
+    r'스테이크|소고기|스테이크하우스': 'steak beef steakhouse',
+    r'바베큐|바비큐|BBQ|구이': 'barbecue bbq grilled restaurant',
+    r'해산물|생선|새우|랍스터|조개|회|횟집': 'seafood fish restaurant',
+    r'샐러드|야채|채식': 'salad vegetarian restaurant',
+
+    # 식당 유형
+    r'카페|커피|에스프레소|라떼|아메리카노|커피숍': 'cafe coffee shop',
+    r'술집|바|맥주|와인|칵테일|호프|주점': 'bar pub beer wine cocktail',
+    r'패스트푸드|패패|패스트': 'fast food restaurant',
+    r'뷔페|부페|올유캔잇': 'buffet all you can eat restaurant',
+
+    # 식사 시간
+    r'아침|모닝|브런치': 'breakfast brunch morning restaurant',
+    r'점심|런치': 'lunch restaurant',
+    r'저녁|디너|만찬': 'dinner evening restaurant',
+    r'야식|새벽|밤': 'late night restaurant',
+
+    # 의도/액션
+    r'추천해|추천해줘|알려줘|찾아줘|검색해|추천받고싶어': 'recommend find search',
+    r'맛있는|맛좋은|맛집': 'delicious tasty good popular restaurant',
+    r'좋은|괜찮은': 'good restaurant',
+    r'최고|베스트': 'best excellent restaurant',
+    r'먹고싶어|먹을|드시고': 'eat food restaurant',
+    r'가고싶어|가서|갈만한': 'go visit restaurant',
+
+    # 특징/분위기
+    r'가족|아이|어린이|키즈': 'family kids children friendly restaurant',
+    r'데이트|로맨틱|커플': 'romantic date couple restaurant',
+    r'조용|정적|차분': 'quiet peaceful restaurant',
+    r'분위기|무드|감성': 'atmosphere ambiance mood restaurant',
+    r'저렴|싸|가성비|가격': 'cheap affordable budget restaurant',
+    r'고급|비싼|프리미엄|럭셔리': 'expensive premium upscale fine dining restaurant',
+}
+
+class KoreanPatternMatcher:
+    """
+    Compiled matcher for KOREAN_FOOD_PATTERNS.
+    Finds every matched concept in a single regex scan of the text.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        """Compile the pattern table into one keyword matcher."""
+        self.translations = list(patterns.values())
+        self.matcher = KeywordMatcher({index: korean_pattern.split('|')
+                                       for index, korean_pattern in enumerate(patterns)})
+
+    def match(self, text: str) -> List[str]:
+        """Return the translations of every concept found in text, in table order."""
+        return [self.translations[index] for index in self.matcher.labels_in(text)]
+
+# Compiled once at import time
+KOREAN_FOOD_MATCHER = KoreanPatternMatcher(KOREAN_FOOD_PATTERNS)
 
 class TranslationService:
     """Korean to English translation service using local models."""
 
-    def __init__(self):
+    def __init__(self,
+                 cache_path: Optional[str] = TRANSLATION_CACHE_PATH,
+                 cache_size: int = TRANSLATION_CACHE_SIZE,
+                 load_mode: str = TRANSLATION_LOAD_MODE,
+                 max_batch_size: int = TRANSLATION_MAX_BATCH_SIZE,
+                 max_wait_ms: float = TRANSLATION_MAX_WAIT_MS):
         """Initialize translation service."""
+        if load_mode not in ("fp32", "int8"):
+            raise ValueError(f"Unknown translation load mode: {load_mode}")
+        self.load_mode = load_mode
         self.translator = None
+
+        # Quantized output can differ slightly, so it is cached under its own model key
+        model_key = TRANSLATION_MODEL_NAME if load_mode == "fp32" else f"{TRANSLATION_MODEL_NAME}:{load_mode}"
+        self.cache = TranslationCache(cache_path, model_key, memory_size=cache_size)
+        self.batcher = MicroBatcher(self._run_model, max_batch_size=max_batch_size,
+                                    max_wait_ms=max_wait_ms, name="translation-batcher")
         self._initialize_translator()
 
     def _initialize_translator(self):
         """Initialize the translation model."""
         try:
-            from transformers import pipeline
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
             import torch
 
             # Use CPU to avoid GPU compatibility issues
@@ -29,14 +144,22 @@ class TranslationService:
 
             # Try to load a lightweight translation model
             # Using Helsinki-NLP models which are known to be reliable
-            model_name = "Helsinki-NLP/opus-mt-ko-en"
+            model_name = TRANSLATION_MODEL_NAME
+
+            logger.info(f"Loading translation model: {model_name} ({self.load_mode})")
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=torch.float32)
+            model.eval()
+
+            if self.load_mode == "int8":
+                # Dynamic quantization: int8 weights for the Linear layers, activations quantized on the fly
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
 
-            logger.info(f"Loading translation model: {model_name}")
             self.translator = pipeline(
                 "translation",
-                model=model_name,
+                model=model,
+                tokenizer=tokenizer,
                 device=device,
-                torch_dtype=torch.float32
             )
             logger.info("Translation model loaded successfully")
 
@@ -45,6 +168,13 @@ class TranslationService:
             logger.info("Falling back to pattern-based translation")
             self.translator = None
 
+    def _run_model(self, texts: List[str]) -> List[str]:
+        """Translate a batch of texts in one generate call and cache the results."""
+        results = self.translator(texts, max_length=TRANSLATION_MAX_LENGTH, batch_size=len(texts))
+        translations = [result['translation_text'] for result in results]
+        self.cache.put_many(zip(texts, translations))
+        return translations
+
     def translate_korean_to_english(self, korean_text: str) -> str:
         """
         Translate Korean text to English.
@@ -55,106 +185,123 @@ class TranslationService:
 
         # First try model-based translation
         if self.translator:
+            # Cached model translations skip the model entirely
+            cached = self.cache.get(korean_text)
+            if cached is not None:
+                TRANSLATIONS.inc(method="cache")
+                return cached
+
             try:
-                result = self.translator(korean_text, max_length=128)
-                if result and len(result) > 0:
-                    translated = result[0]['translation_text']
-                    logger.info(f"Translated '{korean_text}' -> '{translated}'")
-                    return translated
+                # Concurrent queries are grouped into one generate call
+                with STAGE_SECONDS.time(stage="translation_model"):
+                    translated = self.batcher.submit(korean_text)
+                TRANSLATIONS.inc(method="model")
+                sampled_logger.debug("Translated '%s' -> '%s'", korean_text, translated)
+                return translated
             except Exception as e:
                 logger.warning(f"Translation model failed: {e}")
 
         # Fallback to enhanced pattern matching
-        return self._pattern_based_translation(korean_text)
+        with STAGE_SECONDS.time(stage="translation_pattern"):
+            translated = self._pattern_based_translation(korean_text)
+        TRANSLATIONS.inc(method="pattern")
+        return translated
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """
+        Translate a list of Korean texts with a single model call for the uncached ones.
+        Falls back to pattern matching per text if model translation fails.
+        """
+        translations: List[Optional[str]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                translations[i] = text
+                continue
+            if self.translator:
+                cached = self.cache.get(text)
+                if cached is not None:
+                    translations[i] = cached
+                    continue
+            misses.setdefault(text, []).append(i)
+
+        if misses and self.translator:
+            unique = list(misses)
+            try:
+                for text, translated in zip(unique, self._run_model(unique)):
+                    for i in misses[text]:
+                        translations[i] = translated
+            except Exception as e:
+                logger.warning(f"Translation model failed on a batch of {len(unique)}: {e}")
+
+        return [translated if translated is not None else self._pattern_based_translation(text)
+                for text, translated in zip(texts, translations)]
 
     def _pattern_based_translation(self, text: str) -> str:
         """Enhanced pattern-based translation as fallback."""
 
-        # Enhanced Korean food translation patterns
-        KOREAN_FOOD_PATTERNS = {
-            # 국가/지역 음식
-            r'중국|중식|짜장|짬뽕|탕수육|마파두부|궁보|딤섬|중식집|중국집|중국관': 'chinese food restaurant',
-            r'일본|일식|스시|사시미|라멘|우동|소바|돈까스|규동|사케|일식집|일본집': 'japanese sushi ramen restaurant',
-            r'이탈리아|양식|파스타|피자|리조또|스파게티|이탈리아식|양식집': 'italian pasta pizza restaurant',
-            r'태국|태식|팟타이|똠양꿍|그린커리|팬센|태국식': 'thai food restaurant',
-            r'인도|인도식|커리|난|탄두리|바스마티': 'indian curry restaurant',
-            r'베트남|월남|쌀국수|분짜|반미': 'vietnamese pho restaurant',
-            r'멕시코|멕시칸|타코|부리또|케사디야|나초': 'mexican taco burrito restaurant',
-            r'한국|한식|김치|불고기|갈비|비빔밥|냉면|삼겹살|한식집': 'korean bbq restaurant',
-            r'프랑스|프렌치|에스카르고|크로아상': 'french restaurant',
-            r'스페인|스패니시|파에야|타파스': 'spanish restaurant',
-
-            # 음식 유형
-            r'피자|피자집': 'pizza restaurant',
-            r'햄버거|버거|버거집': 'burger hamburger restaurant',
-            r'치킨|닭|프라이드|치킨집': 'chicken fried restaurant',
-            r'스테이크|소고기|스테이크하우스': 'steak beef steakhouse',
-            r'바베큐|바비큐|BBQ|구이': 'barbecue bbq grilled restaurant',
-            r'해산물|생선|새우|랍스터|조개|회|횟집': 'seafood fish restaurant',
-            r'샐러드|야채|채식': 'salad vegetarian restaurant',
-
-            # 식당 유형
-            r'카페|커피|에스프레소|라떼|아메리카노|커피숍': 'cafe coffee shop',
-            r'술집|바|맥주|와인|칵테일|호프|주점': 'bar pub beer wine cocktail',
-            r'패스트푸드|패패|패스트': 'fast food restaurant',
-            r'뷔페|부페|올유캔잇': 'buffet all you can eat restaurant',
-
-            # 식사 시간
-            r'아침|모닝|브런치': 'breakfast brunch morning restaurant',
-            r'점심|런치': 'lunch restaurant',
-            r'저녁|디너|만찬': 'dinner evening restaurant',
-            r'야식|새벽|밤': 'late night restaurant',
-
-            # 의도/액션
-            r'추천해|추천해줘|알려줘|찾아줘|검색해|추천받고싶어': 'recommend find search',
-            r'맛있는|맛좋은|맛집': 'delicious tasty good popular restaurant',
-            r'좋은|괜찮은': 'good restaurant',
-            r'최고|베스트': 'best excellent restaurant',
-            r'먹고싶어|먹을|드시고': 'eat food restaurant',
-            r'가고싶어|가서|갈만한': 'go visit restaurant',
-
-            # 특징/분위기
-            r'가족|아이|어린이|키즈': 'family kids children friendly restaurant',
-            r'데이트|로맨틱|커플': 'romantic date couple restaurant',
-            r'조용|정적|차분': 'quiet peaceful restaurant',
-            r'분위기|무드|감성': 'atmosphere ambiance mood restaurant',
-            r'저렴|싸|가성비|가격': 'cheap affordable budget restaurant',
-            r'고급|비싼|프리미엄|럭셔리': 'expensive premium upscale fine dining restaurant',
-        }
-
-        translated_parts = []
-        remaining_text = text
-
         # Apply pattern matching
-        for korean_pattern, english_translation in KOREAN_FOOD_PATTERNS.items():
-            if re.search(korean_pattern, text, re.IGNORECASE):
-                translated_parts.append(english_translation)
-                # Remove matched parts to avoid overlap
-                remaining_text = re.sub(korean_pattern, '', remaining_text, flags=re.IGNORECASE)
+        translated_parts = KOREAN_FOOD_MATCHER.match(text)
 
         # Combine original and translated parts
         if translated_parts:
-            # Remove duplicates and combine
-            unique_translations = list(set(' '.join(translated_parts).split()))
+            # Remove duplicates (keeping first-seen order) and combine
+            unique_translations = list(dict.fromkeys(' '.join(translated_parts).split()))
             enhanced_query = f"{text} {' '.join(unique_translations)}"
-            logger.info(f"Pattern translated '{text}' -> '{enhanced_query}'")
+            sampled_logger.debug("Pattern translated '%s' -> '%s'", text, enhanced_query)
             return enhanced_query
 
         return text
 
+    def warm_cache(self, queries: Iterable[str], batch_size: int = 32) -> int:
+        """Translate Korean queries that are not cached yet. Returns the number translated."""
+        if not self.translator:
+            logger.warning("Translation model unavailable, cannot warm cache")
+            return 0
+
+        pending = []
+        seen = set()
+        for query in queries:
+            query = query.strip()
+            if not query or query in seen or not self.is_korean_text(query):
+                continue
+            seen.add(query)
+            if self.cache.get(query) is None:
+                pending.append(query)
+
+        for start in range(0, len(pending), batch_size):
+            self.translate_batch(pending[start:start + batch_size])
+        return len(pending)
+
     def is_korean_text(self, text: str) -> bool:
         """Check if text contains Korean characters."""
-        korean_pattern = re.compile(r'[가-힣]+')
-        return bool(korean_pattern.search(text))
+        return bool(KOREAN_PATTERN.search(text))
 
 # Global translation service instance
 _translation_service = None
+_translation_service_lock = threading.Lock()
+
+def _translation_memory_counts():
+    if _translation_service is None:
+        return None
+    return _translation_service.cache.memory.hits, _translation_service.cache.memory.misses
+
+def _translation_disk_counts():
+    if _translation_service is None:
+        return None
+    return _translation_service.cache.disk_hits, _translation_service.cache.disk_misses
+
+track_cache("translation_memory", _translation_memory_counts)
+track_cache("translation_disk", _translation_disk_counts)
 
 def get_translation_service() -> TranslationService:
     """Get or create the global translation service instance."""
     global _translation_service
     if _translation_service is None:
-        _translation_service = TranslationService()
+        with _translation_service_lock:
+            if _translation_service is None:
+                _translation_service = TranslationService()
     return _translation_service
 
 def translate_korean_query(query: str) -> str:
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Vector search backends for restaurant search.
+QdrantBackend queries a Qdrant collection; NumpyBackend answers the same queries
+in-process from a prebuilt, memory-mapped matrix of normalized embeddings.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .metrics import STAGE_SECONDS
+
+# numpy and qdrant_client are imported on first use to keep the package import light
+if TYPE_CHECKING:
+    import numpy as np
+    from qdrant_client import QdrantClient, models
+
+logger = logging.getLogger(__name__)
+
+# File names inside a NumPy index directory
+NUMPY_EMBEDDINGS_FILE = "embeddings.npy"
+NUMPY_PAYLOADS_FILE = "payloads.json"
+
+# Qdrant collection holding one index-version marker point per indexed collection.
+# setup_qdrant.py bumps a collection's version whenever it changes its points, so
+# servers in other processes can tell that their cached results are stale.
+INDEX_VERSIONS_COLLECTION = "index_versions"
+INDEX_VERSION_NAMESPACE = uuid.UUID("0c6f1e52-8d3b-4a7e-b2f4-93a1d5e7c860")
+
+@dataclass
+class SearchHit:
+    """A scored search result, shaped like Qdrant's ScoredPoint."""
+    id: Any
+    score: float
+    payload: Dict[str, Any]
+
+def build_qdrant_filter(filters) -> Optional["models.Filter"]:
+    """Build a native Qdrant filter from SearchFilters."""
+    if not filters:
+        return None
+
+    from qdrant_client import models
+
+    conditions = []
+
+    if filters.location:
+        conditions.append(models.FieldCondition(
+            key="city",
+            match=models.MatchValue(value=filters.location)
+        ))
+
+    if filters.min_stars:
+        conditions.append(models.FieldCondition(
+            key="stars",
+            range=models.Range(gte=filters.min_stars)
+        ))
+
+    if filters.good_for_kids is not None:
+        conditions.append(models.FieldCondition(
+            key="good_for_kids",
+            match=models.MatchValue(value=filters.good_for_kids)
+        ))
+
+    if filters.dogs_allowed is not None:
+        conditions.append(models.FieldCondition(
+            key="dogs_allowed",
+            match=models.MatchValue(value=filters.dogs_allowed)
+        ))
+
+    if filters.categories:
+        # Match any of the specified categories
+        conditions.append(models.FieldCondition(
+            key="categories",
+            match=models.MatchAny(any=list(filters.categories))
+        ))
+
+    if not conditions:
+        return None
+
+    return models.Filter(must=conditions)
+
+def _index_version_point_id(collection_name: str) -> str:
+    return str(uuid.uuid5(INDEX_VERSION_NAMESPACE, collection_name))
+
+def write_index_version(client: "QdrantClient", collection_name: str) -> str:
+    """Record a new index version for collection_name and return it."""
+    from qdrant_client import models
+
+    if not client.collection_exists(INDEX_VERSIONS_COLLECTION):
+        client.create_collection(
+            collection_name=INDEX_VERSIONS_COLLECTION,
+            vectors_config=models.VectorParams(size=1, distance=models.Distance.DOT),
+        )
+    version = uuid.uuid4().hex
+    client.upsert(
+        collection_name=INDEX_VERSIONS_COLLECTION,
+        points=[models.PointStruct(
+            id=_index_version_point_id(collection_name),
+            vector=[1.0],
+            payload={"collection": collection_name, "version": version,
+                     "indexed_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+        )],
+        wait=True,
+    )
+    return version
+
+def read_index_version(client: "QdrantClient", collection_name: str) -> Optional[str]:
+    """Return the index version of collection_name, or None if it was never recorded."""
+    if not client.collection_exists(INDEX_VERSIONS_COLLECTION):
+        return None
+    records = client.retrieve(collection_name=INDEX_VERSIONS_COLLECTION,
+                              ids=[_index_version_point_id(collection_name)],
+                              with_payload=True, with_vectors=False)
+    return records[0].payload.get("version") if records else None
+
+class QdrantBackend:
+    """Vector search against a Qdrant collection."""
+
+    name = "qdrant"
+
+    def __init__(self, client: "QdrantClient", collection_name: str = "restaurants"):
+        self.client = client
+        self.collection_name = collection_name
+
+    def is_ready(self) -> bool:
+        """Return True if the server is reachable and the collection exists."""
+        try:
+            self.client.get_collection(self.collection_name)
+            return True
+        except Exception as e:
+            logger.warning(f"Qdrant collection '{self.collection_name}' unavailable: {e}")
+            return False
+
+    def search(self, query_vector: "np.ndarray", filters, limit: int) -> List[Any]:
+        """Return the top `limit` hits matching filters."""
+        return self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector.tolist(),
+            query_filter=build_qdrant_filter(filters),
+            limit=limit,
+        )
+
+    def fingerprint(self) -> tuple:
+        """Return a value that changes when the collection is re-indexed."""
+        # The point count also catches changes made without setup_qdrant.py, e.g. a dropped collection
+        info = self.client.get_collection(self.collection_name)
+        return (read_index_version(self.client, self.collection_name), info.points_count)
+
+class NumpyBackend:
+    """In-process vector search over a memory-mapped embedding matrix."""
+
+    name = "numpy"
+
+    def __init__(self, index_dir: str):
+        """Load the embedding matrix (memory-mapped) and payloads from index_dir."""
+        import numpy as np
+
+        self.index_dir = index_dir
+        embeddings_path = os.path.join(index_dir, NUMPY_EMBEDDINGS_FILE)
+        payloads_path = os.path.join(index_dir, NUMPY_PAYLOADS_FILE)
+
+        self.embeddings = np.load(embeddings_path, mmap_mode='r')
+        with open(payloads_path, 'r', encoding='utf-8') as f:
+            self.payloads = json.load(f)
+        if len(self.payloads) != self.embeddings.shape[0]:
+            raise ValueError(f"{len(self.payloads)} payloads for {self.embeddings.shape[0]} embeddings")
+
+        # Column arrays for vectorized filtering
+        self.cities = np.array([p.get('city', '') for p in self.payloads], dtype=object)
+        self.stars = np.array([p.get('stars', 0) or 0 for p in self.payloads], dtype=np.float32)
+        self.good_for_kids = np.array([p.get('good_for_kids') is True for p in self.payloads])
+        self.dogs_allowed = np.array([p.get('dogs_allowed') is True for p in self.payloads])
+        self.category_rows = {}
+        for row, payload in enumerate(self.payloads):
+            for category in payload.get('categories', []):
+                self.category_rows.setdefault(category, []).append(row)
+
+        logger.info(f"Loaded NumPy index with {len(self.payloads)} vectors from {index_dir}")
+
+    def is_ready(self) -> bool:
+        return len(self.payloads) > 0
+
+    def _filter_mask(self, filters) -> Optional["np.ndarray"]:
+        """Boolean row mask with the same semantics as build_qdrant_filter."""
+        if not filters:
+            return None
+
+        import numpy as np
+
+        mask = np.ones(len(self.payloads), dtype=bool)
+        if filters.location:
+            mask &= self.cities == filters.location
+        if filters.min_stars:
+            mask &= self.stars >= filters.min_stars
+        if filters.good_for_kids is not None:
+            mask &= self.good_for_kids == filters.good_for_kids
+        if filters.dogs_allowed is not None:
+            mask &= self.dogs_allowed == filters.dogs_allowed
+        if filters.categories:
+            category_mask = np.zeros(len(self.payloads), dtype=bool)
+            for category in filters.categories:
+                category_mask[self.category_rows.get(category, [])] = True
+            mask &= category_mask
+        return mask
+
+    def search(self, query_vector: "np.ndarray", filters, limit: int) -> List[SearchHit]:
+        """Return the top `limit` hits by cosine similarity among rows matching filters."""
+        import numpy as np
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self.embeddings @ query
+        if filters:
+            with STAGE_SECONDS.time(stage="filtering"):
+                mask = self._filter_mask(filters)
+        else:
+            mask = None
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            candidates = int(mask.sum())
+        else:
+            candidates = len(scores)
+
+        k = min(limit, candidates)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [SearchHit(id=int(row), score=float(scores[row]), payload=self.payloads[row])
+                for row in top]
+
+    def fingerprint(self) -> tuple:
+        """Return a value that changes when the index files are rewritten."""
+        stats = [os.stat(os.path.join(self.index_dir, name))
+                 for name in (NUMPY_EMBEDDINGS_FILE, NUMPY_PAYLOADS_FILE)]
+        return tuple((stat.st_ino, stat.st_mtime_ns, stat.st_size) for stat in stats)
+
+def save_numpy_index(index_dir: str, embeddings: "np.ndarray", payloads: List[Dict[str, Any]]):
+    """
+    Write normalized embeddings and payloads in the layout NumpyBackend loads.
+    Files are written aside and renamed into place, so a server that has the old
+    embeddings memory-mapped keeps reading them until it reloads.
+    """
+    import numpy as np
+
+    os.makedirs(index_dir, exist_ok=True)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+
+    embeddings_path = os.path.join(index_dir, NUMPY_EMBEDDINGS_FILE)
+    with open(embeddings_path + ".tmp", 'wb') as f:
+        np.save(f, embeddings / norms)
+    payloads_path = os.path.join(index_dir, NUMPY_PAYLOADS_FILE)
+    with open(payloads_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(payloads, f, ensure_ascii=False)
+    os.replace(payloads_path + ".tmp", payloads_path)
+    os.replace(embeddings_path + ".tmp", embeddings_path)
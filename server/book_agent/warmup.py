@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Eager warm-up of the translation and search models.
+Loading them at startup keeps the first chat after a deploy from paying model load time.
+"""
+
+import logging
+import time
+from typing import Any, Dict
+
+from .embedding_model import EMBEDDING_MODE
+from .restaurant_search import get_search_service
+from .translation_service import get_translation_service
+
+logger = logging.getLogger(__name__)
+
+WARMUP_QUERY = "피자 추천해줘"
+
+def warm_up(query: str = WARMUP_QUERY) -> Dict[str, Any]:
+    """
+    Load both models, run dummy inference and check the vector collection.
+    Raises RuntimeError if the collection is not available.
+    """
+    timings = {}
+    translation_model = False
+
+    # The translation model is only on the query path in translate embedding mode
+    translated = query
+    if EMBEDDING_MODE == "translate":
+        start = time.perf_counter()
+        translation_service = get_translation_service()
+        translated = translation_service.translate_korean_to_english(query)
+        translation_model = translation_service.translator is not None
+        timings["translation_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    search_service = get_search_service()
+    query_embedding = search_service.embedder.encode(translated)
+    timings["embedding_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if not search_service.backend.is_ready():
+        raise RuntimeError(f"Collection '{search_service.collection_name}' is not available")
+    search_service.backend.search(query_embedding, None, 1)
+    timings["search_s"] = time.perf_counter() - start
+
+    status = {
+        "backend": search_service.backend.name,
+        "embedding_mode": search_service.embedding_mode,
+        "translation_model": translation_model,
+        **timings,
+    }
+    logger.info(f"Warm-up complete: {status}")
+    return status
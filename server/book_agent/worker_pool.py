@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Bounded worker pool for running blocking agent functions off the event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from .metrics import Gauge
+from .profiler import run_profiled
+
+logger = logging.getLogger(__name__)
+
+# Worker pool settings (override with environment variables)
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4"))
+AGENT_MAX_IN_FLIGHT = int(os.getenv("AGENT_MAX_IN_FLIGHT", "8"))
+
+class WorkerPool:
+    """Thread pool with a bounded number of in-flight calls and wait-time counters."""
+
+    def __init__(self, max_workers: int = AGENT_WORKERS, max_in_flight: int = AGENT_MAX_IN_FLIGHT):
+        """Initialize the pool."""
+        self.max_workers = max_workers
+        self.max_in_flight = max(max_in_flight, 1)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="book_agent")
+
+        # The semaphore is bound to the event loop that first uses it
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking function on the pool once an in-flight slot is free."""
+        semaphore = self._get_semaphore()
+        submitted_at = time.perf_counter()
+
+        self.queue_depth += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        try:
+            call = functools.partial(func, *args, **kwargs)
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context into the worker, so stage traces see the work done there
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self.executor, context.run, self._call, call, submitted_at)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    def _call(self, call: Callable[[], Any], submitted_at: float) -> Any:
+        """Record how long the call waited before a worker picked it up."""
+        waited = time.perf_counter() - submitted_at
+        with self._lock:
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return run_profiled(call)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool counters."""
+        with self._lock:
+            total_wait = self.total_wait_seconds
+            max_wait = self.max_wait_seconds
+        return {
+            "max_workers": self.max_workers,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "total_wait_seconds": total_wait,
+            "avg_wait_seconds": total_wait / self.completed if self.completed else 0.0,
+            "max_wait_seconds": max_wait,
+        }
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self.executor.shutdown(wait=False)
+
+# Global worker pool instance
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+# Read from the global pool when metrics are rendered
+POOL_IN_FLIGHT = Gauge("book_agent_worker_pool_in_flight", "Agent calls running on the worker pool")
+POOL_QUEUE_DEPTH = Gauge("book_agent_worker_pool_queue_depth", "Agent calls waiting for an in-flight slot")
+POOL_IN_FLIGHT.set_function(lambda: _worker_pool.in_flight if _worker_pool is not None else 0)
+POOL_QUEUE_DEPTH.set_function(lambda: _worker_pool.queue_depth if _worker_pool is not None else 0)
+
+def get_worker_pool() -> WorkerPool:
+    """Get or create the global worker pool instance."""
+    global _worker_pool
+    if _worker_pool is None:
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = WorkerPool()
+                logger.info(f"Agent worker pool: {_worker_pool.max_workers} workers, "
+                            f"{_worker_pool.max_in_flight} in flight")
+    return _worker_pool
@@ -1,6 +1,154 @@
 # pip install fastapi uvicorn
-from fastapi import FastAPI, Request, HTTPException
-app = FastAPI()
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import httpx
+
+from book_agent.log_sampling import SampledLogger
+from book_agent.metrics import CONTENT_TYPE, Gauge, Histogram, current_trace, render_metrics, trace_stages
+from book_agent.profiler import ProfileSession
+from book_agent.slow_query_log import get_slow_query_log
+
+logger = logging.getLogger(__name__)
+# Per-request reply lines are debug records, and only a sample of them is logged
+sampled_logger = SampledLogger(logger)
+
+# Agent execution mode: "proxy" forwards turns to a separate ADK api_server,
+# "inprocess" hosts the ADK runner and root_agent inside this process
+AGENT_MODE = os.getenv("AGENT_MODE", "proxy")
+APP_NAME = "book_agent"
+USER_ID = "user1"
+
+# ADK api_server connection settings (override with environment variables)
+ADK_BASE_URL = os.getenv("ADK_BASE_URL", "http://localhost:8000")
+ADK_MAX_CONNECTIONS = int(os.getenv("ADK_MAX_CONNECTIONS", "100"))
+ADK_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ADK_MAX_KEEPALIVE_CONNECTIONS", "20"))
+ADK_KEEPALIVE_EXPIRY = float(os.getenv("ADK_KEEPALIVE_EXPIRY", "30.0"))
+ADK_CONNECT_TIMEOUT = float(os.getenv("ADK_CONNECT_TIMEOUT", "5.0"))
+ADK_READ_TIMEOUT = float(os.getenv("ADK_READ_TIMEOUT", "60.0"))
+
+# Shared client for the ADK hop, created once per app lifetime
+adk_client: Optional[httpx.AsyncClient] = None
+
+def create_adk_client() -> httpx.AsyncClient:
+    """Create a pooled keep-alive client for the ADK api_server."""
+    return httpx.AsyncClient(
+        base_url=ADK_BASE_URL,
+        limits=httpx.Limits(
+            max_connections=ADK_MAX_CONNECTIONS,
+            max_keepalive_connections=ADK_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=ADK_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            ADK_READ_TIMEOUT,
+            connect=ADK_CONNECT_TIMEOUT,
+        ),
+    )
+
+# Warm the models up at startup; /readyz reports 503 until this finishes
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+WARMUP_QUERY = os.getenv("WARMUP_QUERY", "피자 추천해줘")
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "2.0"))
+
+# WebSocket chat channel settings
+# Heartbeat frames keep idle connections open through NATs and proxies
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "20.0"))
+# Chat turns queued per connection before new ones are rejected
+WS_MAX_PENDING_TURNS = int(os.getenv("WS_MAX_PENDING_TURNS", "4"))
+# A client that does not read its frames for this long is disconnected
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10.0"))
+
+# Server metrics, exposed at /metrics together with the agent's stage metrics in inprocess mode
+ADK_HOP_SECONDS = Histogram(
+    "server_adk_hop_seconds",
+    "Time from handing a turn to the agent until its reply is complete",
+    ["mode", "call"],
+)
+REQUESTS_IN_FLIGHT = Gauge("server_requests_in_flight", "Chat turns being handled, by endpoint", ["endpoint"])
+WS_CONNECTIONS = Gauge("server_websocket_connections", "Open /ws connections")
+
+# Admin endpoints require this token in the X-Admin-Token header; they are disabled while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Active /admin/profile session, counting completed agent turns
+profile_session: Optional[ProfileSession] = None
+
+# In-process ADK runner, only created when AGENT_MODE is "inprocess"
+adk_runner = None
+
+# Readiness state reported by /readyz
+readiness = {"ready": False, "detail": "starting"}
+
+def create_adk_runner():
+    """Host root_agent with an in-memory session service in this process."""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from book_agent.agent import root_agent
+
+    return Runner(
+        app_name=APP_NAME,
+        agent=root_agent,
+        session_service=InMemorySessionService(),
+    )
+
+async def warm_up():
+    """Load and exercise the agent's models, then mark the server ready."""
+    while True:
+        try:
+            if adk_runner is not None:
+                # Models live in this process: load them directly
+                from book_agent.warmup import warm_up as warm_up_models
+                detail = await asyncio.to_thread(warm_up_models, WARMUP_QUERY)
+            else:
+                # Models live in the ADK server: run one turn there to load them
+                session_id = await create_book_session()
+                await invoke_agent(session_id, WARMUP_QUERY)
+                detail = "agent warmed up through ADK api_server"
+            readiness.update(ready=True, detail=detail)
+            logger.info(f"Warm-up complete: {detail}")
+            return
+        except Exception as e:
+            readiness.update(ready=False, detail=f"warm-up failed: {e}")
+            logger.warning(f"Warm-up failed, retrying in {WARMUP_RETRY_INTERVAL}s: {e}")
+            await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global adk_client, adk_runner
+    if AGENT_MODE == "inprocess":
+        adk_runner = create_adk_runner()
+    elif AGENT_MODE == "proxy":
+        adk_client = create_adk_client()
+    else:
+        raise ValueError(f"Unknown AGENT_MODE: {AGENT_MODE}")
+
+    # Warm up in the background so /healthz answers while models load
+    warmup_task = None
+    if WARMUP_ON_STARTUP:
+        readiness.update(ready=False, detail="warming up")
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        readiness.update(ready=True, detail="warm-up disabled")
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+        if adk_client is not None:
+            await adk_client.aclose()
+            adk_client = None
+        if adk_runner is not None:
+            await adk_runner.close()
+            adk_runner = None
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,47 +161,241 @@ app.add_middleware(
 )
 
 import uuid
-import httpx
 
 sessions = set()
 async def create_book_session():
     session_id = str(uuid.uuid4())
-    url = "http://localhost:8000/apps/book_agent/users/user1/sessions/" + session_id
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url)
-        response.raise_for_status()
 
-        data = response.json()
-        return data.get("id", session_id)
+    if adk_runner is not None:
+        session = await adk_runner.session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        return session.id
+
+    url = f"/apps/{APP_NAME}/users/{USER_ID}/sessions/" + session_id
+
+    response = await adk_client.post(url)
+    response.raise_for_status()
+
+    data = response.json()
+    return data.get("id", session_id)
+
+async def run_agent_inprocess(session_id: str, user_message: str) -> str:
+    """Run root_agent directly and return the text of its first reply event."""
+    from google.genai import types
+
+    new_message = types.Content(role="user", parts=[types.Part(text=user_message)])
+    agent_response = ""
+    async for event in adk_runner.run_async(
+        user_id=USER_ID, session_id=session_id, new_message=new_message
+    ):
+        if not agent_response and event.content and event.content.parts:
+            agent_response = event.content.parts[0].text or ""
+    return agent_response
+
+async def run_agent_proxy(session_id: str, user_message: str) -> str:
+    """Forward the turn to the ADK api_server /run endpoint."""
+    url = "/run"
+    payload = {
+        "app_name": APP_NAME,
+        "user_id": USER_ID,
+        "session_id": session_id,
+        "new_message": { "role": "user", "parts": [{ "text": user_message }] },
+    }
+    response = await adk_client.post(url, json=payload)
+    response.raise_for_status()
+    data = response.json()
+
+    return data[0]["content"]["parts"][0]["text"]
 
 async def invoke_agent(session_id: str, user_message: str = "") -> str:
-    url = "http://localhost:8000/run"
+    with ADK_HOP_SECONDS.time(mode=AGENT_MODE, call="run"):
+        if adk_runner is not None:
+            agent_response = await run_agent_inprocess(session_id, user_message)
+        else:
+            hop_start = time.perf_counter()
+            agent_response = await run_agent_proxy(session_id, user_message)
+            trace = current_trace()
+            if trace is not None:
+                # The agent's own stages run in the ADK server, so the hop is this turn's only stage
+                trace.add_stage("adk_hop", time.perf_counter() - hop_start)
+    if profile_session is not None:
+        profile_session.request_done()
+
+    # Parse the JSON response from the agent
+    try:
+        # Parse the JSON string to get the actual message
+        import json
+        parsed_response = json.loads(agent_response)
+        if isinstance(parsed_response, list) and len(parsed_response) > 0:
+            # Return the full parsed response instead of just the first message
+            return agent_response
+    except (json.JSONDecodeError, KeyError, IndexError):
+        pass
+
+    # Fallback to original response if parsing fails
+    return agent_response
+
+async def invoke_agent_logged(session_id: str, user_message: str) -> str:
+    """Run invoke_agent and append the turn to the slow-query log if it is slow."""
+    slow_query_log = get_slow_query_log()
+    if not slow_query_log.enabled:
+        return await invoke_agent(session_id, user_message)
+
+    # In inprocess mode the trace collects the agent's stages; in proxy mode only the ADK hop
+    start = time.perf_counter()
+    with trace_stages() as trace:
+        reply = await invoke_agent(session_id, user_message)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if slow_query_log.is_slow(elapsed_ms):
+        slow_query_log.record(
+            "chat", elapsed_ms,
+            query=user_message,
+            translated_query=trace.details.get("translated_query"),
+            filters=trace.details.get("filters"),
+            result_ids=[item.get("id") for item in parse_reply_items(reply)
+                        if item.get("type") == "Restaurant Option"],
+            stages_ms=trace.stages_ms(),
+            agent_mode=AGENT_MODE,
+            session_id=session_id,
+        )
+    return reply
+
+def parse_reply_items(agent_response: str) -> list:
+    """Parse an agent reply into its list of items, wrapping plain text in a Message."""
+    try:
+        items = json.loads(agent_response)
+        if isinstance(items, list):
+            return items
+    except json.JSONDecodeError:
+        pass
+    return [{"type": "Message", "text": agent_response}]
+
+def event_text(event: dict) -> Optional[str]:
+    """Return the text of an ADK event in its JSON form, if it has any."""
+    parts = (event.get("content") or {}).get("parts") or []
+    return parts[0].get("text") if parts else None
+
+async def stream_agent_inprocess(session_id: str, user_message: str) -> AsyncIterator[dict]:
+    """Run root_agent in streaming mode and yield its events as dicts."""
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai import types
+
+    new_message = types.Content(role="user", parts=[types.Part(text=user_message)])
+    async for event in adk_runner.run_async(
+        user_id=USER_ID, session_id=session_id, new_message=new_message,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    ):
+        yield event.model_dump(mode="json", exclude_none=True)
+
+async def stream_agent_proxy(session_id: str, user_message: str) -> AsyncIterator[dict]:
+    """Forward the turn to the ADK api_server /run_sse endpoint and yield its events."""
+    url = "/run_sse"
     payload = {
-        "app_name": "book_agent",
-        "user_id": "user1",
+        "app_name": APP_NAME,
+        "user_id": USER_ID,
         "session_id": session_id,
         "new_message": { "role": "user", "parts": [{ "text": user_message }] },
+        "streaming": True,
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
+    async with adk_client.stream("POST", url, json=payload) as response:
         response.raise_for_status()
-        data = response.json()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if "error" in event:
+                raise RuntimeError(event["error"])
+            yield event
 
-        # Parse the JSON response from the agent
-        agent_response = data[0]["content"]["parts"][0]["text"]
-        try:
-            # Parse the JSON string to get the actual message
-            import json
-            parsed_response = json.loads(agent_response)
-            if isinstance(parsed_response, list) and len(parsed_response) > 0:
-                # Return the full parsed response instead of just the first message
-                return agent_response
-        except (json.JSONDecodeError, KeyError, IndexError):
-            pass
+async def stream_agent_items(session_id: str, user_message: str) -> AsyncIterator[dict]:
+    """Yield reply items as soon as the agent produces them."""
+    if adk_runner is not None:
+        events = stream_agent_inprocess(session_id, user_message)
+    else:
+        events = stream_agent_proxy(session_id, user_message)
 
-        # Fallback to original response if parsing fails
-        return agent_response
+    # Drain the whole run even after the reply is complete, so the runner
+    # finishes in this task and the ADK response is fully read
+    streamed = False
+    replied = False
+    with ADK_HOP_SECONDS.time(mode=AGENT_MODE, call="stream"):
+        async for event in events:
+            text = event_text(event)
+            if text is None or replied:
+                continue
+            if event.get("partial"):
+                # Partial events carry the items produced so far
+                streamed = True
+                for item in parse_reply_items(text):
+                    yield item
+            else:
+                # The complete reply repeats the streamed items; send it only if the agent did not stream
+                replied = True
+                if not streamed:
+                    for item in parse_reply_items(text):
+                        yield item
+    if profile_session is not None:
+        profile_session.request_done()
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: models are loaded and the collection is available."""
+    status_code = 200 if readiness["ready"] else 503
+    return JSONResponse(status_code=status_code, content=readiness)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, cache hit ratios and in-flight requests."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.post("/admin/profile")
+async def admin_profile(request: Request,
+                        seconds: Optional[float] = None,
+                        requests: Optional[int] = None,
+                        mode: str = "sampling",
+                        sort: str = "cumulative",
+                        limit: int = 50):
+    """
+    Profile this process for a number of seconds, or until a number of agent turns complete,
+    and return the profile with CPU time per thread and torch's thread settings.
+    mode=sampling returns collapsed stacks of all threads; mode=deterministic returns pstats
+    text for the agent calls and model batches. Only one session runs at a time.
+    """
+    global profile_session
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if profile_session is not None:
+        raise HTTPException(status_code=409, detail="A profiling session is already running")
+
+    if seconds is None and requests is None:
+        seconds = 10.0
+    try:
+        session = ProfileSession(mode, seconds=seconds, requests=requests, sort=sort, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    profile_session = session
+    session.start()
+    try:
+        await asyncio.to_thread(session.wait)
+    finally:
+        profile_session = None
+        result = session.stop()
+    return result
 
 @app.post("/session")
 async def create_session():
@@ -69,8 +411,9 @@ async def greetings(request: Request):
     if not session_id or session_id not in sessions:
         raise HTTPException(status_code=400, detail="Invalid session_id")
 
-    greet_msg = await invoke_agent(session_id)
-    print(f"Greeting message: {greet_msg}")
+    with REQUESTS_IN_FLIGHT.track_in_progress(endpoint="/greetings"):
+        greet_msg = await invoke_agent(session_id)
+    sampled_logger.debug("Greeting message: %s", greet_msg)
     return {"text": greet_msg, "session_id": session_id}
 
 @app.post("/chat")
@@ -82,8 +425,129 @@ async def chat(request: Request):
     if not session_id or session_id not in sessions:
         raise HTTPException(status_code=400, detail="Invalid session_id")
 
-    reply = await invoke_agent(session_id, user_message)
-    print(f"reply: {reply}")
+    with REQUESTS_IN_FLIGHT.track_in_progress(endpoint="/chat"):
+        reply = await invoke_agent_logged(session_id, user_message)
+    sampled_logger.debug("reply: %s", reply)
     return {"text": reply, "session_id": session_id}
 
+@app.post("/chat/stream")
+async def chat_stream(request: Request):
+    """Stream the reply as server-sent events: one "data" event per item, then a "done" event."""
+    data = await request.json()
+    session_id = data.get("session_id")
+    user_message = data.get("text", "")
+
+    if not session_id or session_id not in sessions:
+        raise HTTPException(status_code=400, detail="Invalid session_id")
+
+    async def events():
+        with REQUESTS_IN_FLIGHT.track_in_progress(endpoint="/chat/stream"):
+            try:
+                async for item in stream_agent_items(session_id, user_message):
+                    yield sse_event(item)
+                yield sse_event({"session_id": session_id}, event="done")
+            except Exception as e:
+                logger.warning(f"Stream error: {e}")
+                yield sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/ws")
+async def chat_ws(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Chat over one long-lived connection bound to a session.
+    Without a session_id query parameter a new session is created; the first frame names the bound session.
+    Client frames: {"type": "chat", "text": ..., "id": ...}, {"type": "greetings", "id": ...}, {"type": "ping"}.
+    Each turn is answered with one "item" frame per reply item and a "done" frame, both carrying the turn id.
+    """
+    await websocket.accept()
+    if session_id is None:
+        session_id = await create_book_session()
+        sessions.add(session_id)
+    elif session_id not in sessions:
+        await websocket.close(code=4400, reason="Invalid session_id")
+        return
+
+    send_lock = asyncio.Lock()
+    turns: asyncio.Queue = asyncio.Queue(maxsize=WS_MAX_PENDING_TURNS)
+
+    async def send(frame: dict):
+        # Sends wait for the socket to drain, so a slow reader holds back its own turns only
+        async with send_lock:
+            await asyncio.wait_for(websocket.send_json(frame), WS_SEND_TIMEOUT)
+
+    async def receive_frames():
+        while True:
+            # receive_text() fails on binary frames, so take any frame and reject what is not JSON text
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            text = message.get("text")
+            try:
+                frame = json.loads(text) if text is not None else None
+                kind = frame.get("type")
+            except (json.JSONDecodeError, AttributeError):
+                await send({"type": "error", "detail": "Invalid frame: expected a JSON text frame"})
+                continue
+
+            if kind == "ping":
+                await send({"type": "pong"})
+            elif kind in ("chat", "greetings"):
+                try:
+                    turns.put_nowait(frame)
+                except asyncio.QueueFull:
+                    await send({"type": "error", "id": frame.get("id"), "detail": "Too many pending turns"})
+            elif kind != "pong":
+                await send({"type": "error", "id": frame.get("id"), "detail": f"Unknown frame type: {kind}"})
+
+    async def run_turns():
+        # Turns of one session run one at a time, in order
+        while True:
+            frame = await turns.get()
+            turn_id = frame.get("id")
+            user_message = frame.get("text", "") if frame["type"] == "chat" else ""
+            try:
+                with REQUESTS_IN_FLIGHT.track_in_progress(endpoint="/ws"):
+                    async for item in stream_agent_items(session_id, user_message):
+                        await send({"type": "item", "id": turn_id, "item": item})
+            except (WebSocketDisconnect, asyncio.TimeoutError):
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket turn error: {e}")
+                await send({"type": "error", "id": turn_id, "detail": str(e)})
+                continue
+            await send({"type": "done", "id": turn_id})
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL)
+            await send({"type": "ping"})
+
+    await send({"type": "session", "session_id": session_id})
+    tasks = [asyncio.create_task(receive_frames()), asyncio.create_task(run_turns()),
+             asyncio.create_task(heartbeat())]
+    try:
+        with WS_CONNECTIONS.track_in_progress():
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    error = next(iter(done)).exception()
+    if isinstance(error, asyncio.TimeoutError):
+        # The client stopped reading; drop it instead of buffering replies
+        logger.warning(f"WebSocket client of session {session_id} is not reading, closing")
+        try:
+            await asyncio.wait_for(websocket.close(code=1008, reason="Send timeout"), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+    elif error is not None and not isinstance(error, WebSocketDisconnect):
+        logger.warning(f"WebSocket error: {error}")
+
 # FastAPI 실행 명령: uvicorn server:app --host 0.0.0.0 --port 5000
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Check that the quantized int8 ONNX embedding backend agrees with the fp32 model on the restaurant set."""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+from book_agent.embedding_model import load_embedding_model
+
+RESTAURANT_FILES = [
+    "yelp/restaurants_smart_enhanced.json",
+    "yelp/restaurants.json",
+]
+
+QUERIES = [
+    "Italian restaurant for dinner",
+    "Coffee shop with wifi",
+    "Family-friendly breakfast place",
+    "Trendy bar for drinks",
+    "Asian food delivery",
+    "pizza recommend",
+    "chinese food restaurant",
+    "japanese sushi ramen restaurant",
+    "cheap affordable budget restaurant",
+    "romantic date couple restaurant",
+]
+
+TOP_K = 5
+MIN_MEAN_COSINE = 0.99
+MIN_COSINE = 0.95
+MIN_TOPK_OVERLAP = 0.8
+
+def load_restaurant_texts() -> list:
+    """Load the texts the indexer embeds, using the same fallbacks as setup_qdrant.py."""
+    for path in RESTAURANT_FILES:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                restaurants = json.load(f)
+            texts = []
+            for restaurant in restaurants:
+                text = restaurant.get('description', '') or restaurant.get('search_text', '')
+                if not text:
+                    text = f"{restaurant.get('name', '')} {', '.join(restaurant.get('categories', []))}"
+                texts.append(text)
+            return texts
+    return []
+
+def compare_backends(texts: list, candidate: str = "onnx-int8") -> dict:
+    """Embed documents and queries with fp32 and the candidate backend and compare them."""
+    reference_model = load_embedding_model(backend="torch")
+    candidate_model = load_embedding_model(backend=candidate)
+
+    reference_docs = reference_model.encode(texts, batch_size=64, normalize_embeddings=True)
+    candidate_docs = candidate_model.encode(texts, batch_size=64, normalize_embeddings=True)
+    cosines = np.sum(reference_docs * candidate_docs, axis=1)
+
+    # Compare full pipelines: fp32 index + fp32 queries vs. candidate index + candidate queries
+    reference_queries = reference_model.encode(QUERIES, normalize_embeddings=True)
+    candidate_queries = candidate_model.encode(QUERIES, normalize_embeddings=True)
+    overlaps = []
+    for reference_query, candidate_query in zip(reference_queries, candidate_queries):
+        reference_top = set(np.argsort(-(reference_docs @ reference_query))[:TOP_K])
+        candidate_top = set(np.argsort(-(candidate_docs @ candidate_query))[:TOP_K])
+        overlaps.append(len(reference_top & candidate_top) / TOP_K)
+
+    return {
+        "documents": len(texts),
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "mean_topk_overlap": float(np.mean(overlaps)),
+    }
+
+def test_int8_parity():
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    texts = load_restaurant_texts()
+    if not texts:
+        pytest.skip("restaurant data not found")
+
+    result = compare_backends(texts)
+    print(result)
+
+    assert result["mean_cosine"] >= MIN_MEAN_COSINE, result
+    assert result["min_cosine"] >= MIN_COSINE, result
+    assert result["mean_topk_overlap"] >= MIN_TOPK_OVERLAP, result
+
+if __name__ == "__main__":
+    print(compare_backends(load_restaurant_texts()))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Check that importing book_agent stays within an import-time budget."""
+
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server')
+
+# Budget for book_agent's own imports, excluding Google ADK (which the agent always needs)
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "200"))
+
+# Modules that must only be loaded on first real use
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "qdrant_client", "numpy"]
+
+# Pre-import exactly what agent.py takes from ADK so the measurement covers book_agent only
+PRELOAD = (
+    "from google.adk.agents import BaseAgent, InvocationContext; "
+    "from google.adk.events import Event; "
+    "from google.genai.types import ModelContent"
+)
+
+def measure_import_time() -> dict:
+    """Cold-import book_agent in a fresh interpreter with -X importtime."""
+    code = (
+        f"{PRELOAD}\n"
+        "import sys, book_agent.agent\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+    )
+
+    # importtime lines look like "import time:   self |  cumulative | module"
+    # The package no longer imports the agent, so the two entries do not overlap
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() in ('book_agent', 'book_agent.agent'):
+            cumulative_us += int(parts[1].strip())
+    heavy = [m for m in result.stdout.strip().split(',') if m]
+    return {"book_agent_ms": cumulative_us / 1000.0, "heavy_modules": heavy}
+
+def test_import_time():
+    result = measure_import_time()
+    print(f"book_agent import: {result['book_agent_ms']:.1f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+
+    assert not result["heavy_modules"], f"Heavy modules imported eagerly: {result['heavy_modules']}"
+    assert result["book_agent_ms"] <= IMPORT_TIME_BUDGET_MS, \
+        f"book_agent import took {result['book_agent_ms']:.1f} ms, budget is {IMPORT_TIME_BUDGET_MS:.0f} ms"
+
+if __name__ == "__main__":
+    test_import_time()
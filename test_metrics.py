@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Check the Prometheus text rendering of book_agent.metrics."""
+
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+from book_agent.log_sampling import SampledLogger
+from book_agent.metrics import Counter, Gauge, Histogram, MetricsRegistry, timed_iter
+
+def test_render():
+    registry = MetricsRegistry()
+    requests = Counter("requests_total", "Requests", ["endpoint"], registry=registry)
+    in_flight = Gauge("in_flight", "In flight", registry=registry)
+    latency = Histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0), registry=registry)
+
+    requests.inc(endpoint="/chat")
+    requests.inc(2, endpoint="/chat")
+    with in_flight.track_in_progress():
+        assert "in_flight 1" in registry.render()
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage="search")
+    for _ in timed_iter(range(3), latency, stage="format"):
+        pass
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{endpoint="/chat"} 3' in lines
+    assert "in_flight 0" in lines
+    assert 'latency_seconds_bucket{stage="search",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="search",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="search",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="search"} 5.55' in lines
+    assert 'latency_seconds_count{stage="search"} 3' in lines
+    assert 'latency_seconds_count{stage="format"} 1' in lines
+
+def test_function_values():
+    registry = MetricsRegistry()
+    depth = Gauge("queue_depth", "Queue depth", registry=registry)
+    depth.set_function(lambda: 7)
+    assert registry.render().splitlines()[-1] == "queue_depth 7"
+
+def test_sampled_log_caller(caplog):
+    sampled = SampledLogger(logging.getLogger("test_sampled"), rate=1.0)
+    with caplog.at_level(logging.DEBUG, logger="test_sampled"):
+        sampled.debug("debug %s", 1)
+        sampled.info("info %s", 2)
+        sampled.log(logging.INFO, "log %s", 3)
+    assert [record.getMessage() for record in caplog.records] == ["debug 1", "info 2", "log 3"]
+    assert {(record.filename, record.funcName) for record in caplog.records} == {("test_metrics.py", "test_sampled_log_caller")}
+
+if __name__ == "__main__":
+    test_render()
+    test_function_values()
+    print("metrics rendering OK")
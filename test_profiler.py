@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Check both profiling modes of book_agent.profiler."""
+
+import os
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+from book_agent import profiler
+from book_agent.micro_batcher import MicroBatcher
+from book_agent.profiler import ProfileSession, run_profiled
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_sampling_session():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    session = ProfileSession("sampling", seconds=0.3, interval_ms=2)
+    session.start()
+    session.wait()
+    result = session.stop()
+    stop.set()
+    worker.join()
+
+    assert result["format"] == "collapsed" and result["samples"] > 0
+    assert any(line.startswith("busy-worker;") and "busy_loop" in line
+               for line in result["profile"].splitlines())
+    assert result["torch"]["cpu_count"] == os.cpu_count()
+
+def test_deterministic_session_ends_after_requests():
+    session = ProfileSession("deterministic", seconds=30, requests=2)
+    session.start()
+    for _ in range(2):
+        assert run_profiled(sum, range(10)) == 45
+        session.request_done()
+    session.wait()
+    result = session.stop()
+
+    assert result["format"] == "pstats" and result["profiled_calls"] == 2
+    assert result["requests"] == 2 and result["duration_s"] < 30
+    assert "function calls" in result["profile"]
+    # Disabled again once the session stops
+    assert profiler._call_profiler is None
+
+def test_concurrent_calls():
+    session = ProfileSession("deterministic", seconds=30)
+    session.start()
+    barrier = threading.Barrier(4)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(run_profiled(lambda: sum(i * i for i in range(200000))))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = session.stop()
+
+    # Overlapping calls in different threads are all profiled
+    assert results == [sum(i * i for i in range(200000))] * 4
+    assert result["profiled_calls"] == 4 and result["skipped_calls"] == 0
+
+def heavy_batch(items):
+    return [sum(i * i for i in range(100000)) + item for item in items]
+
+def test_batches_profiled_in_batcher_thread():
+    batcher = MicroBatcher(heavy_batch, max_batch_size=4, max_wait_ms=1, name="test-batcher")
+    session = ProfileSession("deterministic", seconds=30)
+    session.start()
+    # The agent call waits while its batch runs on the batcher thread
+    assert run_profiled(batcher.submit, 1) == heavy_batch([1])[0]
+    result = session.stop()
+
+    assert result["profiled_calls"] == 2 and result["skipped_calls"] == 0
+    assert "heavy_batch" in result["profile"]
+
+def test_invalid_settings():
+    for kwargs in ({"mode": "tracing"}, {"sort": "nonsense"}):
+        try:
+            ProfileSession(**kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"{kwargs} was accepted")
+
+if __name__ == "__main__":
+    test_sampling_session()
+    test_deterministic_session_ends_after_requests()
+    test_concurrent_calls()
+    test_batches_profiled_in_batcher_thread()
+    test_invalid_settings()
+    print("profiler OK")
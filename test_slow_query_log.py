@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Check the slow-query log threshold and rotation, and stage tracing of nested turns."""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+from book_agent.metrics import STAGE_SECONDS, trace_stages
+from book_agent.slow_query_log import SlowQueryLog
+
+def test_threshold_and_rotation(tmp_path):
+    path = str(tmp_path / "slow.jsonl")
+    log = SlowQueryLog(path, threshold_ms=100, max_bytes=400, backup_count=2)
+
+    assert not log.record("search", 99.0, query="fast")
+    for i in range(10):
+        assert log.record("search", 150.0, query=f"slow {i}", result_ids=["a", "b"])
+    log.close()
+
+    files = sorted(os.listdir(tmp_path))
+    assert files == ["slow.jsonl", "slow.jsonl.1", "slow.jsonl.2"]
+    with open(path, encoding="utf-8") as f:
+        last = json.loads(f.readlines()[-1])
+    assert last["source"] == "search" and last["query"] == "slow 9" and last["total_ms"] == 150.0
+
+def test_disabled():
+    log = SlowQueryLog("", threshold_ms=0)
+    assert not log.enabled
+    assert not log.record("chat", 1000.0, query="x")
+
+def test_nested_traces():
+    with trace_stages() as turn:
+        STAGE_SECONDS.observe(0.002, stage="routing")
+        with trace_stages() as search:
+            STAGE_SECONDS.observe(0.010, stage="embedding")
+            search.annotate(translated_query="pizza")
+    assert search.stages_ms() == {"embedding": 10.0}
+    assert turn.stages_ms() == {"routing": 2.0, "embedding": 10.0}
+    assert turn.details == {"translated_query": "pizza"}
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_threshold_and_rotation(Path(tmp))
+    test_disabled()
+    test_nested_traces()
+    print("slow-query log OK")
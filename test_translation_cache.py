@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Check that a broken translation cache store degrades to cache misses."""
+
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+from book_agent.translation_cache import TranslationCache
+
+def test_disk_errors_are_misses(tmp_path):
+    path = str(tmp_path / "translations.sqlite3")
+    cache = TranslationCache(path, "model", memory_size=0)
+    cache.put("피자", "pizza")
+    assert cache.get("피자") == "pizza"
+
+    # Break the store behind the cache's back
+    other = sqlite3.connect(path)
+    other.execute("DROP TABLE translations")
+    other.commit()
+    other.close()
+
+    assert cache.get("피자") is None
+    cache.put("치킨", "chicken")
+    cache.close()
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_disk_errors_are_misses(Path(tmp))
+    print("translation cache OK")
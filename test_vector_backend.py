@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Check that backend fingerprints change when the index is rewritten."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from book_agent.vector_backend import NumpyBackend, QdrantBackend, save_numpy_index, write_index_version
+
+def test_qdrant_fingerprint_changes_on_reindex():
+    client = QdrantClient(":memory:")
+    client.create_collection("restaurants", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    client.upsert("restaurants", points=[models.PointStruct(id=1, vector=[1.0, 0.0], payload={"name": "a"})])
+    write_index_version(client, "restaurants")
+    backend = QdrantBackend(client, "restaurants")
+    before = backend.fingerprint()
+
+    # Same point count and vector config, changed content
+    client.upsert("restaurants", points=[models.PointStruct(id=1, vector=[0.0, 1.0], payload={"name": "b"})])
+    write_index_version(client, "restaurants")
+    assert backend.fingerprint() != before
+
+def test_numpy_fingerprint_changes_on_rewrite(tmp_path):
+    index_dir = str(tmp_path)
+    save_numpy_index(index_dir, np.eye(2), [{"name": "a"}, {"name": "b"}])
+    backend = NumpyBackend(index_dir)
+    before = backend.fingerprint()
+    assert backend.fingerprint() == before
+
+    save_numpy_index(index_dir, np.eye(2)[::-1], [{"name": "a"}, {"name": "b"}])
+    assert backend.fingerprint() != before
+    # The old memory-mapped matrix stays readable until the backend is reloaded
+    assert backend.search(np.array([1.0, 0.0]), None, 1)[0].payload == {"name": "a"}
+    assert NumpyBackend(index_dir).search(np.array([1.0, 0.0]), None, 1)[0].payload == {"name": "b"}
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_qdrant_fingerprint_changes_on_reindex()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_numpy_fingerprint_changes_on_rewrite(Path(tmp))
+    print("vector backend fingerprints OK")